@@ -0,0 +1,170 @@
+"""
+Batch degrees-of-separation queries over a persistent process pool.
+
+The graph is loaded once in the parent and shared read-only with the
+workers: forked workers inherit it, and workers started any other way
+load it themselves (memory-mapping the snapshot when one exists).
+
+    python batch.py large [pairs.txt] > paths.jsonl
+    python batch.py large --from 102 [targets.txt] > paths.jsonl
+
+Pairs are read one per line as "source_id<TAB>target_id" (a comma also
+works), targets one IMDB id per line. Each answer is written as a JSON line,
+with an "error" field naming any unknown id instead of a path.
+"""
+import argparse
+import json
+import multiprocessing
+import sys
+
+import degrees
+
+
+class DegreesPool():
+
+    def __init__(self, directory, processes=None, compact=True):
+        self.directory = directory
+        self.compact = compact
+        degrees.load_data(directory, compact=compact)
+        self.pool = multiprocessing.Pool(
+            processes, initializer=_load, initargs=(directory, compact)
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def shortest_paths(self, pairs, bidirectional=False, chunksize=64):
+        """
+        Yields (source, target, path, error) for each (source, target)
+        pair, in input order, answering pairs in parallel. error names an
+        unknown id, and is None for every query that was searched.
+        """
+        jobs = ((source, target, bidirectional) for source, target in pairs)
+        yield from self.pool.imap(_shortest_path, jobs, chunksize)
+
+    def paths_from(self, source, targets):
+        """
+        Returns a dictionary mapping each target to its shortest path from
+        source (see degrees.paths_from), computed in one worker. Raises an
+        Exception if source is unknown.
+        """
+        error = unknown_id(source)
+        if error is not None:
+            raise Exception(error)
+        return self.pool.apply(degrees.paths_from, (source, list(targets)))
+
+    def paths_from_many(self, queries):
+        """
+        Yields (source, paths, error) for each (source, targets) query,
+        running one breadth-first sweep per source in parallel. error names
+        an unknown source, whose paths are all None.
+        """
+        yield from self.pool.imap(_paths_from, queries)
+
+
+def _load(directory, compact):
+    """
+    Worker initializer: load the graph unless it was inherited by fork.
+    """
+    if degrees.graph is None and not degrees.people:
+        degrees.load_data(directory, compact=compact)
+
+
+def unknown_id(*person_ids):
+    """
+    Returns an error naming the first id not in the loaded data, or None.
+    """
+    for person_id in person_ids:
+        if not degrees.is_person(person_id):
+            return f"unknown person id {person_id}"
+    return None
+
+
+def _shortest_path(job):
+    source, target, bidirectional = job
+    error = unknown_id(source, target)
+    if error is not None:
+        return source, target, None, error
+    path = degrees.shortest_path(source, target, bidirectional=bidirectional)
+    return source, target, path, None
+
+
+def _paths_from(query):
+    source, targets = query
+    error = unknown_id(source)
+    if error is not None:
+        return source, {target: None for target in targets}, error
+    return source, degrees.paths_from(source, targets), None
+
+
+def answer(source, target, path, error=None):
+    """
+    Returns the JSON-serializable record for one query. error is set
+    (and path None) when the query named an unknown id.
+    """
+    return {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path,
+        "error": error
+    }
+
+
+def read_pairs(f):
+    for line in f:
+        line = line.strip()
+        if not line:
+            continue
+        fields = line.split("\t") if "\t" in line else line.split(",")
+        if len(fields) != 2:
+            sys.exit(f"Expected two ids per line, got: {line}")
+        yield fields[0].strip(), fields[1].strip()
+
+
+def read_targets(f):
+    for line in f:
+        if line.strip():
+            yield line.strip()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Batch degrees of separation.")
+    parser.add_argument("directory")
+    parser.add_argument("input", nargs="?", type=argparse.FileType("r"),
+                        default=sys.stdin)
+    parser.add_argument("--from", dest="source",
+                        help="answer every target from this person id")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--bidirectional", action="store_true")
+    args = parser.parse_args()
+
+    with DegreesPool(args.directory, processes=args.processes) as pool:
+        if args.source is not None:
+            targets = list(read_targets(args.input))
+            source_error = unknown_id(args.source)
+            if source_error is None:
+                paths = pool.paths_from(args.source, targets)
+            else:
+                paths = {}
+            results = (
+                (args.source, target, paths.get(target),
+                 source_error or unknown_id(target))
+                for target in targets
+            )
+        else:
+            results = pool.shortest_paths(read_pairs(args.input),
+                                          bidirectional=args.bidirectional)
+        for source, target, path, error in results:
+            print(json.dumps(answer(source, target, path, error)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,282 @@
+"""
+Benchmarks for the degrees search code.
+
+    python benchmark.py frontier [sizes...]
+    python benchmark.py landmarks directory [K] [queries]
+    python benchmark.py load directory
+    python benchmark.py maze [size] [directory]
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+import degrees
+from graph import load_graph, load_snapshot, snapshot_fresh, snapshot_path
+from grid import Grid
+from landmarks import build_index
+from util import Node, StackFrontier, QueueFrontier
+
+
+class ListStackFrontier():
+    """The original list-backed frontier, kept for comparison."""
+
+    def __init__(self):
+        self.frontier = []
+
+    def add(self, node):
+        self.frontier.append(node)
+
+    def contains_state(self, state):
+        return any(node.state == state for node in self.frontier)
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        node = self.frontier[-1]
+        self.frontier = self.frontier[:-1]
+        return node
+
+
+class ListQueueFrontier(ListStackFrontier):
+
+    def remove(self):
+        node = self.frontier[0]
+        self.frontier = self.frontier[1:]
+        return node
+
+
+def frontier_throughput(frontier_class, size):
+    """
+    Returns operations per second for `size` adds, `size` membership
+    checks and `size` removes on a fresh frontier.
+    """
+    nodes = [Node(state=i, parent=None, action=None) for i in range(size)]
+    frontier = frontier_class()
+    start = time.perf_counter()
+    for node in nodes:
+        frontier.add(node)
+    for i in range(size):
+        frontier.contains_state(i)
+    while not frontier.empty():
+        frontier.remove()
+    elapsed = time.perf_counter() - start
+    return 3 * size / elapsed
+
+
+def benchmark_frontier(sizes):
+    classes = [StackFrontier, QueueFrontier]
+    for size in sizes:
+        for frontier_class in classes:
+            ops = frontier_throughput(frontier_class, size)
+            print(f"{frontier_class.__name__:18} {size:>9} nodes  {ops:>14,.0f} ops/s")
+
+    # The list frontiers are quadratic, so only time them on a small size
+    size = min(sizes[0], 10 ** 4)
+    for frontier_class in [ListStackFrontier, ListQueueFrontier]:
+        ops = frontier_throughput(frontier_class, size)
+        print(f"{frontier_class.__name__:18} {size:>9} nodes  {ops:>14,.0f} ops/s")
+
+
+def benchmark_landmarks(directory, k, queries):
+    degrees.load_data(directory, compact=True)
+    graph = degrees.graph
+
+    start = time.perf_counter()
+    index = build_index(graph, k)
+    elapsed = time.perf_counter() - start
+    size = len(index.distances) + 4 * len(index.landmarks)
+    print(f"Build: {len(index.landmarks)} landmarks in {elapsed:.2f}s, "
+          f"{size:,} bytes")
+
+    # Random people with at least one movie
+    rng = random.Random(0)
+    people = [p for p in range(len(graph)) if len(graph.movies_for(p))]
+    pairs = [(graph.person_ids[rng.choice(people)],
+              graph.person_ids[rng.choice(people)]) for _ in range(queries)]
+
+    timings = {}
+    for name, guided in [("bfs", False), ("landmark a*", True)]:
+        degrees.index = index if guided else None
+        start = time.perf_counter()
+        for source, target in pairs:
+            degrees.shortest_path(source, target, guided=guided)
+        timings[name] = time.perf_counter() - start
+        print(f"{name:12} {queries} queries in {timings[name]:.3f}s")
+
+    start = time.perf_counter()
+    for source, target in pairs:
+        index.bounds(graph.person_index(source), graph.person_index(target))
+    elapsed = time.perf_counter() - start
+    print(f"{'bounds':12} {queries} queries in {elapsed:.3f}s")
+    if timings["landmark a*"]:
+        print(f"Speedup: {timings['bfs'] / timings['landmark a*']:.1f}x")
+
+
+def load_dictreader(directory):
+    """The original DictReader loader, kept for comparison."""
+    names, people, movies = {}, {}, {}
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"],
+                "movies": set()
+            }
+            names.setdefault(row["name"].lower(), set()).add(row["id"])
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"],
+                "stars": set()
+            }
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                people[row["person_id"]]["movies"].add(row["movie_id"])
+                movies[row["movie_id"]]["stars"].add(row["person_id"])
+            except KeyError:
+                pass
+
+
+def benchmark_load(directory):
+    def reset():
+        degrees.names.clear()
+        degrees.people.clear()
+        degrees.movies.clear()
+
+    # Both CSV paths parse the files even when a snapshot exists; the
+    # snapshot is timed on its own row so the comparison stays honest
+    loaders = [
+        ("dictreader", lambda: load_dictreader(directory)),
+        ("streaming", lambda: degrees.load_data(directory)),
+        ("compact", lambda: load_graph(directory))
+    ]
+    if snapshot_fresh(directory):
+        loaders.append(
+            ("snapshot", lambda: load_snapshot(snapshot_path(directory)))
+        )
+    for name, load in loaders:
+        reset()
+        start = time.perf_counter()
+        load()
+        elapsed = time.perf_counter() - start
+        print(f"{name:12} {elapsed:.3f}s")
+
+
+def generate_maze(kind, size, seed=0):
+    """
+    Returns the lines of a size x size maze of one kind:
+    "open" (rooms joined by doorways), "corridors" (a recursive
+    backtracker maze) or "random" (30% random walls, retried until
+    solvable). Start is near the top-left, goal near the bottom-right.
+    """
+    rng = random.Random(seed)
+    size -= 1 - size % 2
+    if kind == "open":
+        room = max(4, size // 8)
+        cells = [["#" if i % room == 0 or j % room == 0 or i == size - 1
+                  or j == size - 1 else " " for j in range(size)]
+                 for i in range(size)]
+        for i in range(0, size - 1, room):
+            for j in range(0, size - 1, room):
+                if j:
+                    cells[min(i + room // 2, size - 2)][j] = " "
+                if i:
+                    cells[i][min(j + room // 2, size - 2)] = " "
+    elif kind == "corridors":
+        cells = [["#"] * size for _ in range(size)]
+        stack = [(1, 1)]
+        cells[1][1] = " "
+        while stack:
+            i, j = stack[-1]
+            options = [(i + di, j + dj, i + di // 2, j + dj // 2)
+                       for di, dj in [(-2, 0), (2, 0), (0, -2), (0, 2)]
+                       if 0 < i + di < size - 1 and 0 < j + dj < size - 1
+                       and cells[i + di][j + dj] == "#"]
+            if not options:
+                stack.pop()
+                continue
+            ni, nj, wi, wj = rng.choice(options)
+            cells[wi][wj] = " "
+            cells[ni][nj] = " "
+            stack.append((ni, nj))
+    else:
+        while True:
+            cells = [["#" if rng.random() < 0.3 else " " for _ in range(size)]
+                     for _ in range(size)]
+            cells[1][1] = "A"
+            cells[size - 2][size - 2] = "B"
+            try:
+                Grid.from_lines(["".join(row) for row in cells]).solve("astar")
+                break
+            except Exception:
+                continue
+
+    cells[1][1] = "A"
+    cells[size - 2][size - 2] = "B"
+    return ["".join(row) for row in cells]
+
+
+def benchmark_maze(size, directory):
+    for kind in ["open", "corridors", "random"]:
+        filename = os.path.join(directory, f"{kind}{size}.txt")
+        with open(filename, "w") as f:
+            f.write("\n".join(generate_maze(kind, size)) + "\n")
+        grid = Grid.from_file(filename)
+        for algorithm in ["bfs", "astar", "jps"]:
+            start = time.perf_counter()
+            grid.solve(algorithm)
+            elapsed = time.perf_counter() - start
+            print(f"{kind:10} {algorithm:6} {grid.num_explored:>10} expanded  "
+                  f"{len(grid.solution[1]):>7} steps  {elapsed:.3f}s")
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in BENCHMARKS:
+        sys.exit(f"Usage: python benchmark.py {'|'.join(BENCHMARKS)} [args...]")
+    BENCHMARKS[sys.argv[1]](sys.argv[2:])
+
+
+def frontier(args):
+    sizes = [int(arg) for arg in args] or [10 ** 5, 10 ** 6]
+    benchmark_frontier(sizes)
+
+
+def landmarks(args):
+    if not args:
+        sys.exit("Usage: python benchmark.py landmarks directory [K] [queries]")
+    k = int(args[1]) if len(args) > 1 else 16
+    queries = int(args[2]) if len(args) > 2 else 100
+    benchmark_landmarks(args[0], k, queries)
+
+
+def load(args):
+    if len(args) != 1:
+        sys.exit("Usage: python benchmark.py load directory")
+    benchmark_load(args[0])
+
+
+def maze(args):
+    size = int(args[0]) if args else 500
+    if len(args) > 1:
+        benchmark_maze(size, args[1])
+    else:
+        with tempfile.TemporaryDirectory() as directory:
+            benchmark_maze(size, directory)
+
+
+BENCHMARKS = {
+    "frontier": frontier,
+    "landmarks": landmarks,
+    "load": load,
+    "maze": maze
+}
+
+
+if __name__ == "__main__":
+    main()
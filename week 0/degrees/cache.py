@@ -0,0 +1,91 @@
+"""
+LRU cache of projected co-star adjacency for the degrees searches.
+"""
+import sys
+from collections import OrderedDict
+
+# Rough cost of one (movie, person) pair held in a cached tuple
+PAIR_BYTES = sys.getsizeof((0, 0)) + 8
+
+
+class NeighborCache():
+
+    def __init__(self, compute, max_entries=None, max_bytes=None):
+        # Function mapping a state to its (movie, person) pairs
+        self.compute = compute
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # Maps states to (pairs, estimated bytes), least recently used first
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, state):
+        return state in self.entries
+
+    def get(self, state):
+        """
+        Returns a tuple of (movie, person) pairs for a state,
+        computing and caching it on a miss.
+        """
+        try:
+            pairs, _ = self.entries[state]
+        except KeyError:
+            self.misses += 1
+            pairs = tuple(self.compute(state))
+            self.put(state, pairs)
+            return pairs
+        self.hits += 1
+        self.entries.move_to_end(state)
+        return pairs
+
+    def put(self, state, pairs):
+        size = sys.getsizeof(pairs) + len(pairs) * PAIR_BYTES
+        if state in self.entries:
+            self.bytes -= self.entries.pop(state)[1]
+        self.entries[state] = (pairs, size)
+        self.bytes += size
+        self.evict()
+
+    def evict(self):
+        """
+        Drops least recently used entries until within budget,
+        always keeping the newest entry.
+        """
+        while len(self.entries) > 1 and (
+            (self.max_entries is not None and len(self.entries) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            _, (_, size) = self.entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def materialize(self, states):
+        """
+        Computes and keeps the adjacency of every state, lifting the
+        budget so the whole person-person graph stays resident.
+        """
+        self.max_entries = None
+        self.max_bytes = None
+        for state in states:
+            if state not in self.entries:
+                self.put(state, tuple(self.compute(state)))
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions
+        }
@@ -0,0 +1,231 @@
+"""
+Connected components of the degrees star graph.
+
+Union-find over the compact graph labels every person with a component,
+so a query between two components is answered without searching. The
+labels are saved as components.index next to the CSVs. An optional offline
+job computes, per component, a histogram of degrees of separation
+between its people, fanning the breadth-first sweeps out over processes.
+
+    python components.py large [--histograms] [--samples N] [--processes N]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import struct
+from array import array
+
+from graph import (SnapshotError, header_fresh, load_graph, load_snapshot,
+                   map_file, read_header, snapshot_fresh, snapshot_path)
+from landmarks import UNREACHABLE, distances_from
+
+# Index file written next to the CSVs
+INDEX = "components.index"
+INDEX_MAGIC = b"DEGCOMP\0"
+INDEX_VERSION = 1
+
+# Header: magic, version, number of components, number of people
+HEADER = struct.Struct("<8sIII")
+
+
+class Components():
+
+    def __init__(self, labels, count):
+        # labels[p] is the component of person index p
+        self.labels = labels
+        self.count = count
+
+        # Backing memory map, when loaded from disk
+        self.buffer = None
+
+    def connected(self, s, t):
+        """
+        Returns True if person indices s and t share a component.
+        """
+        return self.labels[s] == self.labels[t]
+
+    def members(self):
+        """
+        Returns a list of person indices for each component.
+        """
+        members = [[] for _ in range(self.count)]
+        for p, label in enumerate(self.labels):
+            members[label].append(p)
+        return members
+
+
+def label_components(graph):
+    """
+    Returns Components for a StarGraph, joining the stars of every movie.
+    """
+    parent = array("i", range(len(graph)))
+    size = array("i", [1]) * len(graph)
+
+    def find(p):
+        while parent[p] != p:
+            parent[p] = parent[parent[p]]
+            p = parent[p]
+        return p
+
+    for m in range(len(graph.movie_ids)):
+        stars = graph.stars_for(m)
+        if len(stars) < 2:
+            continue
+        root = find(stars[0])
+        for q in stars[1:]:
+            other = find(q)
+            if other == root:
+                continue
+            if size[other] > size[root]:
+                root, other = other, root
+            parent[other] = root
+            size[root] += size[other]
+
+    # Relabel roots densely, in order of first appearance
+    labels = array("i", [0]) * len(graph)
+    dense = {}
+    for p in range(len(graph)):
+        labels[p] = dense.setdefault(find(p), len(dense))
+    return Components(labels, len(dense))
+
+
+def index_path(directory):
+    """
+    Returns the path of the components index for a data directory.
+    """
+    return os.path.join(directory, INDEX)
+
+
+def index_fresh(directory, size=None):
+    """
+    Returns True if the directory has a components index newer than its
+    CSVs that this version can read and, if `size` is given, that labels
+    that many people. Anything else is reported on stderr and treated as
+    stale.
+    """
+    return header_fresh(directory, index_path(directory), check_header, size)
+
+
+def check_header(data, path, size=None):
+    """
+    Validates a components index header, returning (components, people).
+    """
+    count, people = read_header(data, path, INDEX_MAGIC, INDEX_VERSION,
+                                "components index")
+    if size is not None and people != size:
+        raise SnapshotError(f"{path} labels {people} people, expected {size}")
+    return count, people
+
+
+def save_components(components, path):
+    """
+    Write component labels to disk.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION,
+                            components.count, len(components.labels)))
+        f.write(bytes(components.labels))
+    os.replace(temporary, path)
+
+
+def load_components(path, size=None):
+    """
+    Memory-map a components index file, raising SnapshotError if it cannot
+    be read or, when `size` is given, does not label that many people.
+    """
+    buffer, view, (count, size) = map_file(path, check_header, size)
+
+    labels = view[HEADER.size:HEADER.size + 4 * size].cast("i")
+    components = Components(labels, count)
+    components.buffer = buffer
+    return components
+
+
+# Graph shared with histogram workers
+_graph = None
+
+
+def _load(directory):
+    global _graph
+    if _graph is None:
+        _graph = _load_graph(directory)
+
+
+def _histogram(job):
+    """
+    Returns (component, {degrees: count}) for the people reachable
+    from one source.
+    """
+    label, source = job
+    histogram = {}
+    for distance in distances_from(_graph, source):
+        if 0 < distance != UNREACHABLE:
+            histogram[distance] = histogram.get(distance, 0) + 1
+    return label, histogram
+
+
+def distance_histograms(directory, graph, components, samples=None,
+                        processes=None, seed=0):
+    """
+    Returns {component: {degrees: count}} over pairs of people in each
+    component of more than one person, sweeping from every member or
+    from `samples` random members per component, in parallel.
+    """
+    global _graph
+    _graph = graph
+    rng = random.Random(seed)
+    jobs = []
+    for label, members in enumerate(components.members()):
+        if len(members) < 2:
+            continue
+        if samples is not None and len(members) > samples:
+            members = rng.sample(members, samples)
+        jobs.extend((label, source) for source in members)
+
+    histograms = {}
+    with multiprocessing.Pool(processes, initializer=_load,
+                              initargs=(directory,)) as pool:
+        for label, histogram in pool.imap_unordered(_histogram, jobs, 16):
+            total = histograms.setdefault(label, {})
+            for distance, count in histogram.items():
+                total[distance] = total.get(distance, 0) + count
+    return histograms
+
+
+def _load_graph(directory):
+    if snapshot_fresh(directory):
+        return load_snapshot(snapshot_path(directory))
+    return load_graph(directory)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label connected components.")
+    parser.add_argument("directory")
+    parser.add_argument("--histograms", action="store_true",
+                        help="also compute degree-distance histograms")
+    parser.add_argument("--samples", type=int, default=None,
+                        help="sources sampled per component for histograms")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args()
+
+    print("Loading data...")
+    graph = _load_graph(args.directory)
+    components = label_components(graph)
+    path = index_path(args.directory)
+    save_components(components, path)
+    print(f"Wrote {path} ({components.count} components).")
+
+    if args.histograms:
+        histograms = distance_histograms(args.directory, graph, components,
+                                         samples=args.samples,
+                                         processes=args.processes)
+        for label in sorted(histograms):
+            histogram = {d: histograms[label][d] for d in sorted(histograms[label])}
+            print(json.dumps({"component": label, "histogram": histogram}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Filtered and weighted degrees queries.
+
+Filters are applied while expanding people, so no filtered copy of the
+graph is ever built: a movie outside the year range or in the excluded
+titles is skipped before its stars are scanned, and people outside an
+allowed subset are never reached. With a weight function the search
+becomes Dijkstra over a binary heap, each step costing weight(title, year)
+of the movie it goes through.
+"""
+import heapq
+import itertools
+
+import degrees
+
+
+def constrained_path(source, target, min_year=None, max_year=None,
+                     exclude_titles=(), people=None, weight=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs from source
+    to target using only movies from `min_year` to `max_year` (inclusive)
+    whose titles are not in `exclude_titles`, and only people in `people`
+    (an iterable of person ids; source and target are always allowed).
+
+    If `weight` is given, return the cheapest path instead, where each
+    step costs weight(title, year) >= 0 for the movie it uses.
+
+    If no possible path, returns None.
+    """
+    result = constrained_search(source, target, min_year, max_year,
+                                exclude_titles, people, weight)
+    return None if result is None else result[1]
+
+
+def cheapest_path(source, target, weight, **filters):
+    """
+    Returns (cost, path) for the cheapest path from source to target under
+    `weight` and the filters of constrained_path, or None.
+    """
+    return constrained_search(source, target, weight=weight, **filters)
+
+
+def age_weight(reference_year=2020, per_year=0.05):
+    """
+    Returns a weight function making older movies cost more: one plus
+    `per_year` for every year before `reference_year`.
+    """
+    def weight(title, year):
+        year = _year(year)
+        if year is None or year >= reference_year:
+            return 1
+        return 1 + per_year * (reference_year - year)
+    return weight
+
+
+def constrained_search(source, target, min_year=None, max_year=None,
+                       exclude_titles=(), people=None, weight=None):
+    """
+    Returns (cost, path) for constrained_path, or None.
+    """
+    source, target, _ = degrees.search_space(source, target)
+    if source == target:
+        return None
+
+    allowed_people = None
+    if people is not None:
+        allowed_people = {degrees.state_for(person_id) for person_id in people}
+        allowed_people.update([source, target])
+
+    expand = _filtered_neighbors(min_year, max_year, set(exclude_titles),
+                                 allowed_people)
+    if weight is None:
+        path = _breadth_first(source, target, expand)
+        return None if path is None else (len(path), degrees.ids_for_path(path))
+    return _dijkstra(source, target, expand, _movie_cost(weight))
+
+
+def _movie_record(movie):
+    """
+    Returns (title, year) of a movie search state.
+    """
+    if degrees.graph is not None:
+        return degrees.graph.movie_titles[movie], degrees.graph.movie_years[movie]
+    record = degrees.movies[movie]
+    return record["title"], record["year"]
+
+
+def _year(year):
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+
+def _filtered_neighbors(min_year, max_year, exclude_titles, allowed_people):
+    """
+    Returns a function yielding (movie, person) pairs that pass the filters.
+    Each movie is checked once per query.
+    """
+    if degrees.graph is not None:
+        movies_for = degrees.graph.movies_for
+        stars_for = degrees.graph.stars_for
+    else:
+        def movies_for(person_id):
+            return degrees.people[person_id]["movies"]
+
+        def stars_for(movie_id):
+            return degrees.movies[movie_id]["stars"]
+
+    filtering = min_year is not None or max_year is not None or exclude_titles
+    checked = {}
+
+    def movie_allowed(movie):
+        try:
+            return checked[movie]
+        except KeyError:
+            pass
+        title, year = _movie_record(movie)
+        year = _year(year)
+        allowed = not (
+            title in exclude_titles
+            or (min_year is not None and (year is None or year < min_year))
+            or (max_year is not None and (year is None or year > max_year))
+        )
+        checked[movie] = allowed
+        return allowed
+
+    def expand(state):
+        for movie in movies_for(state):
+            if filtering and not movie_allowed(movie):
+                continue
+            for person in stars_for(movie):
+                if allowed_people is None or person in allowed_people:
+                    yield movie, person
+    return expand
+
+
+def _movie_cost(weight):
+    """
+    Memoizes weight(title, year) per movie search state.
+    """
+    costs = {}
+
+    def cost(movie):
+        try:
+            return costs[movie]
+        except KeyError:
+            value = weight(*_movie_record(movie))
+            if value < 0:
+                raise ValueError("movie weights must be non-negative")
+            costs[movie] = value
+            return value
+    return cost
+
+
+def _path_to(parents, state):
+    path = []
+    while parents[state] is not None:
+        movie, parent = parents[state]
+        path.append((movie, state))
+        state = parent
+    path.reverse()
+    return path
+
+
+def _breadth_first(source, target, expand):
+    parents = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for state in layer:
+            for movie, person in expand(state):
+                if person in parents:
+                    continue
+                parents[person] = (movie, state)
+                if person == target:
+                    return _path_to(parents, person)
+                next_layer.append(person)
+        layer = next_layer
+    return None
+
+
+def _dijkstra(source, target, expand, cost):
+    parents = {source: None}
+    best = {source: 0}
+    done = set()
+    counter = itertools.count()
+    queue = [(0, next(counter), source)]
+    while queue:
+        distance, _, state = heapq.heappop(queue)
+        if state in done:
+            continue
+        if state == target:
+            return distance, degrees.ids_for_path(_path_to(parents, state))
+        done.add(state)
+        for movie, person in expand(state):
+            if person in done:
+                continue
+            candidate = distance + cost(movie)
+            if person not in best or candidate < best[person]:
+                best[person] = candidate
+                parents[person] = (movie, state)
+                heapq.heappush(queue, (candidate, next(counter), person))
+    return None
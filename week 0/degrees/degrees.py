@@ -1,6 +1,16 @@
-import csv
+import argparse
+import bisect
 import sys
 
+from cache import NeighborCache
+from components import index_fresh as components_fresh
+from components import index_path as components_path
+from components import load_components
+from graph import load_graph, load_snapshot, snapshot_fresh, snapshot_path
+from ingest import Progress, read_people_and_movies, stream_stars
+from landmarks import index_fresh, index_path, landmark_path, load_index
+from metrics import add_sink, json_lines, start_trace
+from nameindex import index_for_graph, index_for_people
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,54 +22,124 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact StarGraph, used instead of the dictionaries above when loaded
+graph = None
 
-def load_data(directory):
+# LandmarkIndex over the compact graph, when one has been built
+index = None
+
+# NeighborCache of co-star adjacency, when enabled
+neighbor_cache = None
+
+# NameIndex for find_people, built once per load
+name_index = None
+
+# Components labelling of the people, when one has been built
+components = None
+
+# Sorted person ids, mapping dictionary-mode ids to component label indices
+component_ids = None
+
+
+def load_data(directory, compact=False, progress=False):
     """
     Load data from CSV files into memory.
+
+    If `progress` is true, report rows and rows/sec per file on stderr.
+
+    If `compact` is true, load an integer-indexed StarGraph instead
+    of the names, people and movies dictionaries. A snapshot compiled
+    with graph.py that is newer than the CSVs is then memory-mapped
+    instead of parsing anything, as is a landmark index built with
+    landmarks.py. Without `compact`, the dictionaries are always filled
+    from the CSVs, snapshot or not. Component labels built with
+    components.py are used in either mode, and the name search index
+    used by find_people is built once loading finishes.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
+    global graph, index, neighbor_cache, name_index, components, component_ids
+    index = None
+    components = None
+    component_ids = None
+    neighbor_cache = None
+    name_index = None
+    progress = Progress() if progress else None
+    if not compact:
+        graph = None
+    elif snapshot_fresh(directory):
+        graph = load_snapshot(snapshot_path(directory))
+    else:
+        graph = load_graph(directory, progress)
+    if graph is not None:
+        if index_fresh(directory, len(graph)):
+            index = load_index(index_path(directory), len(graph))
+        if components_fresh(directory, len(graph)):
+            components = load_components(components_path(directory),
+                                         len(graph))
+        build_name_index()
+        return
+
+    # Load people and movies concurrently
+    people_rows, movie_rows = read_people_and_movies(directory, progress)
+    for person_id, name, birth in people_rows:
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        if name.lower() not in names:
+            names[name.lower()] = {person_id}
+        else:
+            names[name.lower()].add(person_id)
+
+    for movie_id, title, year in movie_rows:
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+
+    # Stream stars
+    for chunk in stream_stars(directory, progress):
+        for person_id, movie_id in chunk:
             try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
             except KeyError:
                 pass
 
+    # Labels are stored by person index, which is the sorted id order
+    if components_fresh(directory, len(people)):
+        components = load_components(components_path(directory), len(people))
+        component_ids = sorted(people)
+    build_name_index()
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Degrees of separation.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="load the integer-indexed CSR graph "
+                             "(the default when a fresh snapshot exists)")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends at once")
+    parser.add_argument("--guided", action="store_true",
+                        help="use the landmark index as an A* heuristic")
+    parser.add_argument("--cache", type=int, metavar="ENTRIES",
+                        help="cache co-star adjacency for this many people")
+    parser.add_argument("--progress", action="store_true",
+                        help="report CSV loading progress")
+    parser.add_argument("--trace", type=argparse.FileType("w"), metavar="FILE",
+                        help="write search metrics as JSON lines (- for stdout)")
+    args = parser.parse_args()
+    if args.trace is not None:
+        add_sink(json_lines(args.trace))
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    compact = args.compact or snapshot_fresh(args.directory)
+    load_data(args.directory, compact=compact, progress=args.progress)
+    if args.cache is not None:
+        enable_neighbor_cache(max_entries=args.cache)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,7 +149,16 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    bounds = degree_bounds(source, target)
+    if bounds is not None:
+        lower, upper = bounds
+        if lower is None:
+            print("Landmarks: not connected.")
+        elif upper is not None:
+            print(f"Landmarks: between {lower} and {upper} degrees.")
+
+    path = shortest_path(source, target, bidirectional=args.bidirectional,
+                         guided=args.guided)
 
     if path is None:
         print("Not connected.")
@@ -78,23 +167,60 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = person_record(path[i][1])["name"]
+            person2 = person_record(path[i + 1][1])["name"]
+            movie = movie_record(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, guided=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If `bidirectional` is true, search from both ends at once
+    (see bidirectional_path). If `guided` is true and a landmark
+    index is loaded, run A* with the landmark heuristic instead.
+    If component labels are loaded, people in different components
+    are reported as not connected without searching.
     """
+    if guided and index is not None:
+        mode = "guided"
+    elif bidirectional:
+        mode = "bidirectional"
+    else:
+        mode = "bfs"
+    trace = start_trace("degrees", mode=mode, source=source, target=target)
+
+    if components is not None and not components.connected(
+        component_state(source), component_state(target)
+    ):
+        path = None
+    elif mode == "guided":
+        path = ids_for_path(landmark_path(
+            graph, index, state_for(source), state_for(target), trace
+        ))
+    elif mode == "bidirectional":
+        path = bidirectional_path(source, target, trace)
+    else:
+        path = breadth_first_path(source, target, trace)
+
+    if trace is not None:
+        trace.finish(degrees=None if path is None else len(path))
+    return path
+
+
+def breadth_first_path(source, target, trace=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from the source.
 
-    # TODO
-    print('source: ' + source)
-    print('target: ' + target)
+    If no possible path, returns None.
+    """
+    source, target, expand = search_space(source, target, trace)
 
     # Primer Estado
     start = Node(state=source, parent=None, action=None)
@@ -117,8 +243,10 @@ def shortest_path(source, target):
 
         # Take the node from the frontier
         node = frontier.remove()
-        neigh = neighbors_for_person(node.state)
+        neigh = expand(node.state)
         explored.add(node.state)
+        if trace is not None:
+            trace.expanded(len(frontier.frontier), len(explored))
         
 
         for movie, actor in neigh:
@@ -130,25 +258,175 @@ def shortest_path(source, target):
                         path.append((node.action,node.state))
                         node = node.parent
                     path.reverse()
-                    return path
+                    return ids_for_path(path)
                 frontier.add(child)
 
         
     # raise NotImplementedError
 
 
+def bidirectional_path(source, target, trace=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends and always growing the smaller frontier by one layer.
+
+    If no possible path, returns None.
+    """
+    source, target, expand = search_space(source, target, trace)
+    if source == target:
+        return None
+
+    # Each side maps a reached state to (movie, state one step closer to its root)
+    forward = {source: None}
+    backward = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+
+    while forward_layer and backward_layer:
+
+        # Grow whichever side has the smaller frontier
+        grow_forward = len(forward_layer) <= len(backward_layer)
+        if grow_forward:
+            layer, reached, other = forward_layer, forward, backward
+        else:
+            layer, reached, other = backward_layer, backward, forward
+
+        # Expand the whole layer, remembering the meeting point closest
+        # to the other side's root
+        next_layer = []
+        meeting = None
+        for state in layer:
+            if trace is not None:
+                trace.expanded(len(layer) + len(next_layer),
+                               len(forward) + len(backward))
+            for movie, person in expand(state):
+                if person in reached:
+                    continue
+                reached[person] = (movie, state)
+                next_layer.append(person)
+                if person in other:
+                    distance = _depth(other, person)
+                    if meeting is None or distance < meeting[0]:
+                        meeting = (distance, person)
+
+        if grow_forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+        if meeting is not None:
+            return ids_for_path(_stitch(forward, backward, meeting[1]))
+
+    return None
+
+
+def _depth(parents, state):
+    """
+    Returns how many steps `state` is from the root of a parent map.
+    """
+    depth = 0
+    while parents[state] is not None:
+        state = parents[state][1]
+        depth += 1
+    return depth
+
+
+def _stitch(forward, backward, meeting):
+    """
+    Joins the forward and backward parent maps at `meeting` into
+    a list of (movie, person) pairs from source to target.
+    """
+    path = []
+    state = meeting
+    while forward[state] is not None:
+        movie, previous = forward[state]
+        path.append((movie, state))
+        state = previous
+    path.reverse()
+
+    state = meeting
+    while backward[state] is not None:
+        movie, following = backward[state]
+        path.append((movie, following))
+        state = following
+    return path
+
+
+def paths_from(source, targets):
+    """
+    Returns a dictionary mapping each target to the shortest list of
+    (movie_id, person_id) pairs from source to it, or None if not connected.
+
+    All targets are answered by a single breadth-first sweep from source,
+    which stops as soon as every target has been reached. Raises an
+    Exception for an unknown source; unknown targets map to None.
+    """
+    if not is_person(source):
+        raise Exception(f"unknown person id {source}")
+    source_state, _, expand = search_space(source, source)
+    wanted = {state_for(target): target for target in targets
+              if is_person(target)}
+    wanted.pop(source_state, None)
+    paths = {target: None for target in targets}
+
+    # Maps each reached state to (movie, parent state)
+    parents = {source_state: None}
+    layer = [source_state]
+    while layer and wanted:
+        next_layer = []
+        for state in layer:
+            for movie, person in expand(state):
+                if person in parents:
+                    continue
+                parents[person] = (movie, state)
+                next_layer.append(person)
+                if person in wanted:
+                    path = []
+                    step = person
+                    while parents[step] is not None:
+                        path.append((parents[step][0], step))
+                        step = parents[step][1]
+                    path.reverse()
+                    paths[wanted.pop(person)] = ids_for_path(path)
+        layer = next_layer
+    return paths
+
+
+def degree_bounds(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark index, without searching.
+
+    Returns None if no index is loaded, and (None, None) if the
+    landmarks prove the two are not connected. upper is None when no
+    landmark reaches either person, in which case lower is just 0.
+    """
+    if index is None:
+        return None
+    return index.bounds(state_for(source), state_for(target))
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.person_ids_for_name(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = find_people(name, limit=3)
+        if suggestions:
+            print("Did you mean: " + ", ".join(
+                f"{person['name']} ({person['birth']})" for person in suggestions
+            ) + "?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = person_record(person_id)
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -163,11 +441,43 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def find_people(query, limit=10, fuzzy=True):
+    """
+    Returns up to `limit` ranked candidates for a name or name prefix,
+    as dictionaries of id, name, birth and score, without prompting.
+
+    Exact matches rank first, then prefix matches, then (if `fuzzy`)
+    names within a few typos.
+    """
+    if name_index is None:
+        build_name_index()
+    return name_index.search(query, limit=limit, fuzzy=fuzzy)
+
+
+def build_name_index():
+    """
+    Builds the name and trigram index over whichever store is loaded,
+    so the first find_people call doesn't pay for it. Called by load_data.
+    """
+    global name_index
+    if graph is not None:
+        name_index = index_for_graph(graph)
+    else:
+        name_index = index_for_people(people)
+    name_index.build_trigrams()
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if neighbor_cache is not None and graph is None:
+        return set(neighbor_cache.get(person_id))
+    if graph is not None:
+        p = graph.person_index(person_id)
+        return {(graph.movie_ids[m], graph.person_ids[q])
+                for m, q in graph.neighbors(p)}
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -176,5 +486,116 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def person_record(person_id):
+    """
+    Returns the name and birth of a person from whichever store is loaded.
+    """
+    if graph is not None:
+        return graph.person(person_id)
+    return people[person_id]
+
+
+def movie_record(movie_id):
+    """
+    Returns the title and year of a movie from whichever store is loaded.
+    """
+    if graph is not None:
+        return graph.movie(movie_id)
+    return movies[movie_id]
+
+
+def search_space(source, target, trace=None):
+    """
+    Returns the source and target search states, plus the function
+    that expands a state into (movie, person) pairs.
+
+    With the compact graph loaded, states are integer indices and
+    expansion walks CSR slices instead of rebuilding a set. If `trace`
+    is given, expansion is timed into it.
+    """
+    if neighbor_cache is not None:
+        expand = neighbor_cache.get
+    elif graph is None:
+        expand = neighbors_for_person
+    else:
+        expand = graph.neighbors
+    if trace is not None:
+        expand = trace.timed(expand)
+    return state_for(source), state_for(target), expand
+
+
+def enable_neighbor_cache(max_entries=None, max_bytes=None, materialize=False):
+    """
+    Caches the (movie, person) pairs of each expanded person in an LRU
+    bounded by `max_entries` and/or an estimated `max_bytes`, for the
+    store currently loaded. If `materialize` is true, project the whole
+    person-person graph up front instead (only sensible for small datasets).
+
+    Returns the NeighborCache, whose stats() reports hits and misses.
+    """
+    global neighbor_cache
+    if graph is None:
+        compute = _star_pairs
+        states = people
+    else:
+        compute = graph.neighbors
+        states = range(len(graph))
+    neighbor_cache = NeighborCache(compute, max_entries=max_entries,
+                                   max_bytes=max_bytes)
+    if materialize:
+        neighbor_cache.materialize(states)
+    return neighbor_cache
+
+
+def disable_neighbor_cache():
+    global neighbor_cache
+    neighbor_cache = None
+
+
+def _star_pairs(person_id):
+    """
+    Yields (movie_id, person_id) pairs from the dictionaries.
+    """
+    for movie_id in people[person_id]["movies"]:
+        for costar in movies[movie_id]["stars"]:
+            yield movie_id, costar
+
+
+def is_person(person_id):
+    """
+    Returns True if the loaded data has a person with this IMDB id.
+    """
+    if graph is not None:
+        return graph.person_index(person_id) is not None
+    return person_id in people
+
+
+def state_for(person_id):
+    """
+    Returns the search state for an IMDB person id.
+    """
+    if graph is None:
+        return person_id
+    return graph.person_index(person_id)
+
+
+def component_state(person_id):
+    """
+    Returns the index of a person in the component labels.
+    """
+    if graph is not None:
+        return graph.person_index(person_id)
+    return bisect.bisect_left(component_ids, person_id)
+
+
+def ids_for_path(path):
+    """
+    Converts a path of search states back to (movie_id, person_id) pairs.
+    """
+    if graph is None or path is None:
+        return path
+    return [(graph.movie_ids[m], graph.person_ids[p]) for m, p in path]
+
+
 if __name__ == "__main__":
     main()
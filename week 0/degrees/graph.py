@@ -0,0 +1,429 @@
+"""
+Compact integer-indexed store for the degrees star graph.
+
+People and movies are interned to dense integers (in sorted IMDB id order)
+and the bipartite star graph is kept in CSR form: an offsets array plus a
+flat neighbor array for person -> movies and for movie -> people.
+
+A loaded graph can be compiled to a versioned binary snapshot next to the
+CSVs and memory-mapped back in without parsing anything:
+
+    python graph.py large
+"""
+import bisect
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from ingest import Progress, read_people_and_movies, stream_stars
+
+# Snapshot file written next to the CSVs
+SNAPSHOT = "graph.snapshot"
+SNAPSHOT_MAGIC = b"DEGSNAP\0"
+SNAPSHOT_VERSION = 1
+
+# Header: magic, version, byte order flag, number of sections
+HEADER = struct.Struct("<8sIII")
+
+# Section entry: name, typecode, byte offset, byte length
+ENTRY = struct.Struct("<32s1sQQ")
+
+# Sections of a StarGraph, in snapshot order
+SECTIONS = (
+    "person_ids", "person_names", "person_births",
+    "movie_ids", "movie_titles", "movie_years",
+    "person_offsets", "person_movies",
+    "movie_offsets", "movie_people",
+    "name_keys", "name_people"
+)
+
+
+class SnapshotError(Exception):
+    """
+    Raised for a snapshot or index file this version cannot read.
+    """
+
+
+class StringTable():
+    """
+    Read-only sequence of strings packed into a single UTF-8 buffer.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        offsets = array("q", [0])
+        parts = []
+        position = 0
+        for s in strings:
+            encoded = s.encode("utf-8")
+            parts.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+        return cls(b"".join(parts), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class StarGraph():
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies,
+                 movie_offsets, movie_people,
+                 name_keys, name_people):
+
+        # Sorted IMDB ids; the position of an id is its integer index
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+
+        # CSR adjacency in both directions
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Lowercase names sorted, with the matching person index for each
+        self.name_keys = name_keys
+        self.name_people = name_people
+
+        # Backing memory map, when loaded from a snapshot
+        self.buffer = None
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def person_index(self, person_id):
+        """
+        Returns the integer index for an IMDB person id, or None.
+        """
+        return _index(self.person_ids, person_id)
+
+    def movie_index(self, movie_id):
+        """
+        Returns the integer index for an IMDB movie id, or None.
+        """
+        return _index(self.movie_ids, movie_id)
+
+    def movies_for(self, p):
+        """
+        Returns the movie indices person `p` starred in.
+        """
+        return self.person_movies[self.person_offsets[p]:self.person_offsets[p + 1]]
+
+    def stars_for(self, m):
+        """
+        Returns the person indices who starred in movie `m`.
+        """
+        return self.movie_people[self.movie_offsets[m]:self.movie_offsets[m + 1]]
+
+    def neighbors(self, p):
+        """
+        Yields (movie, person) index pairs for people
+        who starred with person `p`.
+        """
+        for m in self.movies_for(p):
+            for q in self.stars_for(m):
+                yield m, q
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDB ids of every person with the given name.
+        """
+        key = name.lower()
+        i = bisect.bisect_left(self.name_keys, key)
+        person_ids = []
+        while i < len(self.name_keys) and self.name_keys[i] == key:
+            person_ids.append(self.person_ids[self.name_people[i]])
+            i += 1
+        return person_ids
+
+    def person(self, person_id):
+        """
+        Returns a dictionary of name and birth for an IMDB person id.
+        """
+        p = self.person_index(person_id)
+        return {
+            "name": self.person_names[p],
+            "birth": self.person_births[p]
+        }
+
+    def movie(self, movie_id):
+        """
+        Returns a dictionary of title and year for an IMDB movie id.
+        """
+        m = self.movie_index(movie_id)
+        return {
+            "title": self.movie_titles[m],
+            "year": self.movie_years[m]
+        }
+
+
+def _index(ids, key):
+    """
+    Binary searches a sorted sequence of ids.
+    """
+    i = bisect.bisect_left(ids, key)
+    if i < len(ids) and ids[i] == key:
+        return i
+    return None
+
+
+def _csr(size, pairs):
+    """
+    Builds (offsets, neighbors) arrays from (row, column) pairs sorted by row.
+    """
+    offsets = array("i", [0]) * (size + 1)
+    neighbors = array("i")
+    for row, column in pairs:
+        offsets[row + 1] += 1
+        neighbors.append(column)
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+    return offsets, neighbors
+
+
+def load_graph(directory, progress=None):
+    """
+    Load data from CSV files into a StarGraph.
+    """
+    # Load people and movies concurrently
+    people_rows, movie_rows = read_people_and_movies(directory, progress)
+    people_rows.sort()
+    movie_rows.sort()
+    person_ids = [row[0] for row in people_rows]
+    person_names = [row[1] for row in people_rows]
+    person_births = [row[2] for row in people_rows]
+    movie_ids = [row[0] for row in movie_rows]
+    movie_titles = [row[1] for row in movie_rows]
+    movie_years = [row[2] for row in movie_rows]
+    del people_rows, movie_rows
+
+    # Stream stars, keyed as a single integer so duplicates collapse cheaply
+    person_lookup = {person_id: p for p, person_id in enumerate(person_ids)}
+    movie_lookup = {movie_id: m for m, movie_id in enumerate(movie_ids)}
+    num_movies = len(movie_ids)
+    edges = set()
+    for chunk in stream_stars(directory, progress):
+        for person_id, movie_id in chunk:
+            try:
+                p = person_lookup[person_id]
+                m = movie_lookup[movie_id]
+            except KeyError:
+                continue
+            edges.add(p * num_movies + m)
+    edges = sorted(edges)
+    del person_lookup, movie_lookup
+
+    person_offsets, person_movies = _csr(
+        len(person_ids), (divmod(edge, num_movies) for edge in edges)
+    )
+    movie_edges = sorted(
+        (m, p) for p, m in (divmod(edge, num_movies) for edge in edges)
+    )
+    movie_offsets, movie_people = _csr(num_movies, movie_edges)
+    del edges, movie_edges
+
+    # Sorted name index for exact lookups
+    name_order = sorted(
+        range(len(person_names)), key=lambda p: person_names[p].lower()
+    )
+    name_keys = [person_names[p].lower() for p in name_order]
+
+    return StarGraph(
+        person_ids=StringTable.from_strings(person_ids),
+        person_names=StringTable.from_strings(person_names),
+        person_births=StringTable.from_strings(person_births),
+        movie_ids=StringTable.from_strings(movie_ids),
+        movie_titles=StringTable.from_strings(movie_titles),
+        movie_years=StringTable.from_strings(movie_years),
+        person_offsets=person_offsets,
+        person_movies=person_movies,
+        movie_offsets=movie_offsets,
+        movie_people=movie_people,
+        name_keys=StringTable.from_strings(name_keys),
+        name_people=array("i", name_order)
+    )
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot for a data directory.
+    """
+    return os.path.join(directory, SNAPSHOT)
+
+
+def snapshot_fresh(directory):
+    """
+    Returns True if the directory has a snapshot newer than its CSVs
+    that this version can read. A snapshot with a different magic,
+    version or byte order is reported on stderr and treated as stale.
+    """
+    return header_fresh(directory, snapshot_path(directory), check_header)
+
+
+def header_fresh(directory, path, check, *args):
+    """
+    Returns True if `path` is newer than the directory's CSVs and
+    check(header, path, *args) accepts its header. A file that cannot be
+    read or fails the check is reported on stderr and treated as stale.
+    """
+    if not newer_than_csvs(directory, path):
+        return False
+    try:
+        with open(path, "rb") as f:
+            check(f.read(HEADER.size), path, *args)
+    except (OSError, struct.error, SnapshotError) as e:
+        print(f"Ignoring {os.path.basename(path)}: {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def newer_than_csvs(directory, path):
+    """
+    Returns True if `path` exists and is newer than the directory's CSVs.
+    """
+    try:
+        built = os.path.getmtime(path)
+    except OSError:
+        return False
+    for filename in ("people.csv", "movies.csv", "stars.csv"):
+        try:
+            if os.path.getmtime(os.path.join(directory, filename)) > built:
+                return False
+        except OSError:
+            pass
+    return True
+
+
+def save_snapshot(graph, path):
+    """
+    Write a StarGraph to a binary snapshot file.
+    """
+    # Flatten string tables into their offsets and blob
+    chunks = []
+    for name in SECTIONS:
+        section = getattr(graph, name)
+        if isinstance(section, StringTable):
+            chunks.append((f"{name}.offsets", "q", bytes(section.offsets)))
+            chunks.append((f"{name}.blob", "B", bytes(section.blob)))
+        else:
+            chunks.append((name, section.typecode, bytes(section)))
+
+    # Lay out data after the header and entry table, 8-byte aligned
+    position = HEADER.size + ENTRY.size * len(chunks)
+    entries = []
+    for name, typecode, data in chunks:
+        position += -position % 8
+        entries.append((name, typecode, position, len(data)))
+        position += len(data)
+
+    # Write to a temporary file first so readers never see a partial snapshot
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                            sys.byteorder == "little", len(chunks)))
+        for name, typecode, offset, length in entries:
+            f.write(ENTRY.pack(name.encode("ascii"), typecode.encode("ascii"),
+                               offset, length))
+        for (name, typecode, data), (_, _, offset, _) in zip(chunks, entries):
+            f.write(b"\0" * (offset - f.tell()))
+            f.write(data)
+    os.replace(temporary, path)
+
+
+def read_header(data, path, magic, version, kind):
+    """
+    Checks the magic and version of a header written with HEADER,
+    returning its two remaining fields.
+    """
+    found, found_version, first, second = HEADER.unpack_from(data, 0)
+    if found != magic:
+        raise SnapshotError(f"{path} is not a {kind}")
+    if found_version != version:
+        raise SnapshotError(f"{path} has {kind} version {found_version}, "
+                            f"expected {version}")
+    return first, second
+
+
+def check_header(data, path):
+    """
+    Validates a snapshot header, returning its number of sections.
+    """
+    little, count = read_header(data, path, SNAPSHOT_MAGIC, SNAPSHOT_VERSION,
+                                "degrees snapshot")
+    if bool(little) != (sys.byteorder == "little"):
+        raise SnapshotError(f"{path} was written with a different byte order")
+    return count
+
+
+def map_file(path, check, *args):
+    """
+    Memory-map a file and validate its header with check(view, path, *args),
+    returning (buffer, view, whatever the check returned).
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buffer)
+    return buffer, view, check(view, path, *args)
+
+
+def load_snapshot(path):
+    """
+    Memory-map a snapshot file back into a StarGraph.
+    """
+    buffer, view, count = map_file(path, check_header)
+
+    chunks = {}
+    for i in range(count):
+        name, typecode, offset, length = ENTRY.unpack_from(
+            view, HEADER.size + i * ENTRY.size
+        )
+        name = name.rstrip(b"\0").decode("ascii")
+        chunks[name] = view[offset:offset + length].cast(typecode.decode("ascii"))
+
+    sections = {}
+    for name in SECTIONS:
+        if name in chunks:
+            sections[name] = chunks[name]
+        else:
+            sections[name] = StringTable(chunks[f"{name}.blob"],
+                                         chunks[f"{name}.offsets"])
+    graph = StarGraph(**sections)
+    graph.buffer = buffer
+    return graph
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python graph.py directory")
+    directory = sys.argv[1]
+
+    print("Loading data...")
+    graph = load_graph(directory, Progress())
+    path = snapshot_path(directory)
+    save_snapshot(graph, path)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
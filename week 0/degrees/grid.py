@@ -0,0 +1,515 @@
+"""
+Grid-optimized maze solver engine.
+
+Cells are integer indices (row * width + col). Walls and the explored set
+are bitsets in bytearrays, and each reached cell stores the direction it
+was entered from in a flat bytearray, which doubles as the visited mark.
+A 10k x 10k maze needs about 125 MB for that state plus the frontier.
+
+    python grid.py maze.txt [bfs|dfs|greedy|astar|jps] [image.png]
+"""
+import heapq
+import sys
+from collections import deque
+
+ALGORITHMS = ("bfs", "dfs", "greedy", "astar", "jps")
+
+# Direction a cell was entered from; 0 means not reached yet
+UNREACHED = 0
+UP = 1
+DOWN = 2
+LEFT = 3
+RIGHT = 4
+START = 5
+
+ACTIONS = {UP: "up", DOWN: "down", LEFT: "left", RIGHT: "right"}
+
+
+class NoSolution(Exception):
+    """
+    Raised when a search exhausts the maze without reaching the goal.
+    """
+
+
+def image_scale(height, width):
+    """
+    Returns (cell_size, cell_border) that keep a rendered maze to a few
+    thousand pixels across, dropping borders once cells get small.
+    """
+    cell_size = max(1, min(50, 4000 // max(height, width)))
+    cell_border = 2 if cell_size >= 10 else 0
+    return cell_size, cell_border
+
+
+class Grid():
+
+    def __init__(self, height, width, walls, start, goal):
+        self.height = height
+        self.width = width
+
+        # Bitset: bit i set if cell i is a wall
+        self.walls = walls
+        self.start = start
+        self.goal = goal
+
+        self.parents = None
+        self.explored = None
+        self.num_explored = 0
+        self.solution = None
+
+        # Per-row jump masks, filled lazily by _row_masks
+        self._rows = {}
+
+    @classmethod
+    def from_lines(cls, lines):
+        """
+        Builds a Grid from maze text lines ("A" start, "B" goal,
+        " " open, anything else a wall); short lines are open past their end.
+        """
+        lines = [line.rstrip("\r\n") for line in lines]
+        height = len(lines)
+        width = max(len(line) for line in lines)
+        builder = GridBuilder(width)
+        for line in lines:
+            builder.add_row(line)
+        return builder.build(height)
+
+    @classmethod
+    def from_file(cls, filename):
+        """
+        Streams a maze file into a Grid row by row: one pass finds the
+        size and checks the start and goal, a second fills the wall bitset.
+        """
+        height = 0
+        width = 0
+        starts = 0
+        goals = 0
+        with open(filename) as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                height += 1
+                width = max(width, len(line))
+                starts += line.count("A")
+                goals += line.count("B")
+        if starts != 1:
+            raise Exception("maze must have exactly one start point")
+        if goals != 1:
+            raise Exception("maze must have exactly one goal")
+
+        builder = GridBuilder(width)
+        with open(filename) as f:
+            for line in f:
+                builder.add_row(line.rstrip("\r\n"))
+        return builder.build(height)
+
+    def __len__(self):
+        return self.height * self.width
+
+    def is_wall(self, cell):
+        return self.walls[cell >> 3] >> (cell & 7) & 1
+
+    def is_explored(self, cell):
+        return self.explored is not None and self.explored[cell >> 3] >> (cell & 7) & 1
+
+    def position(self, cell):
+        return divmod(cell, self.width)
+
+    def cell(self, position):
+        return position[0] * self.width + position[1]
+
+    def neighbors(self, cell):
+        """
+        Yields (direction, cell) for each open cell next to `cell`.
+        """
+        width = self.width
+        walls = self.walls
+        col = cell % width
+        candidates = []
+        if cell >= width:
+            candidates.append((UP, cell - width))
+        if cell < len(self) - width:
+            candidates.append((DOWN, cell + width))
+        if col > 0:
+            candidates.append((LEFT, cell - 1))
+        if col < width - 1:
+            candidates.append((RIGHT, cell + 1))
+        for direction, neighbor in candidates:
+            if not walls[neighbor >> 3] >> (neighbor & 7) & 1:
+                yield direction, neighbor
+
+    def parent(self, cell):
+        """
+        Returns the cell `cell` was reached from, or None for the start.
+        """
+        direction = self.parents[cell]
+        if direction == UP:
+            return cell + self.width
+        if direction == DOWN:
+            return cell - self.width
+        if direction == LEFT:
+            return cell + 1
+        if direction == RIGHT:
+            return cell - 1
+        return None
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        """
+        Renders the grid to a PNG file (see render.output_image).
+        """
+        from render import output_image
+        output_image(self, filename, show_solution=show_solution,
+                     show_explored=show_explored, cell_size=cell_size,
+                     cell_border=cell_border)
+
+    def heuristic(self, cell):
+        """
+        Manhattan distance from `cell` to the goal.
+        """
+        row, col = divmod(cell, self.width)
+        goal_row, goal_col = divmod(self.goal, self.width)
+        return abs(row - goal_row) + abs(col - goal_col)
+
+    def solve(self, algorithm="bfs", trace=None):
+        """
+        Finds a solution with the given algorithm, setting solution to
+        (actions, cells) like maze.Maze, with cells as (row, col) tuples.
+        num_explored counts cells taken off the frontier. If `trace` is a
+        metrics.Trace, each expansion and the time spent finding
+        neighbors (jumps, for jps) are recorded on it.
+        """
+        if algorithm not in ALGORITHMS:
+            raise Exception(f"unknown algorithm {algorithm}")
+        self.parents = bytearray(len(self))
+        self.explored = bytearray((len(self) + 7) // 8)
+        self.num_explored = 0
+        self.parents[self.start] = START
+
+        if algorithm in ("bfs", "dfs"):
+            found = self._uninformed(algorithm == "bfs", trace)
+        elif algorithm == "jps":
+            found = self._jump_point_search(trace)
+        else:
+            found = self._best_first(algorithm == "astar", trace)
+        if not found:
+            raise NoSolution("no solution")
+
+        actions = []
+        cells = []
+        cell = self.goal
+        while self.parents[cell] != START:
+            actions.append(ACTIONS[self.parents[cell]])
+            cells.append(self.position(cell))
+            cell = self.parent(cell)
+        actions.reverse()
+        cells.reverse()
+        self.solution = (actions, cells)
+        return self.solution
+
+    def _mark_explored(self, cell):
+        self.num_explored += 1
+        self.explored[cell >> 3] |= 1 << (cell & 7)
+
+    def _uninformed(self, breadth_first, trace=None):
+        """
+        Breadth-first (queue) or depth-first (stack) search; cells are
+        marked reached when first added, like util's frontiers.
+        """
+        parents = self.parents
+        neighbors = self.neighbors if trace is None else trace.timed(self.neighbors)
+        frontier = deque([self.start])
+        remove = frontier.popleft if breadth_first else frontier.pop
+        while frontier:
+            cell = remove()
+            self._mark_explored(cell)
+            if trace is not None:
+                trace.expanded(len(frontier), self.num_explored)
+            if cell == self.goal:
+                return True
+            for direction, neighbor in neighbors(cell):
+                if parents[neighbor] == UNREACHED:
+                    parents[neighbor] = direction
+                    frontier.append(neighbor)
+        return False
+
+    def _best_first(self, astar, trace=None):
+        """
+        Greedy best-first (h) or A* (g + h) search. A cell's parent is
+        fixed when it is first popped, which keeps A* optimal with the
+        consistent Manhattan heuristic without a per-cell cost array.
+
+        Heap entries pack (f, h, cell, direction) into one int, so ties
+        on f go to the cell closest to the goal; for A*, g is f - h.
+        """
+        parents = self.parents
+        neighbors = self.neighbors if trace is None else trace.timed(self.neighbors)
+        cell_bits = max(len(self).bit_length(), 1)
+        h_bits = max((self.height + self.width).bit_length(), 1)
+        cell_mask = (1 << cell_bits) - 1
+        h_mask = (1 << h_bits) - 1
+
+        def push(queue, g, cell, direction):
+            h = self.heuristic(cell)
+            f = g + h if astar else h
+            heapq.heappush(
+                queue, ((f << h_bits | h) << cell_bits | cell) << 3 | direction
+            )
+
+        queue = []
+        push(queue, 0, self.start, START)
+        parents[self.start] = UNREACHED
+        while queue:
+            key = heapq.heappop(queue)
+            direction = key & 7
+            cell = key >> 3 & cell_mask
+            h = key >> 3 + cell_bits & h_mask
+            g = (key >> 3 + cell_bits + h_bits) - h if astar else 0
+            if parents[cell] != UNREACHED:
+                continue
+            parents[cell] = direction
+            self._mark_explored(cell)
+            if trace is not None:
+                trace.expanded(len(queue), self.num_explored)
+            if cell == self.goal:
+                return True
+            for direction, neighbor in neighbors(cell):
+                if parents[neighbor] == UNREACHED:
+                    push(queue, g + 1, neighbor, direction)
+        return False
+
+    def _open(self, cell):
+        return 0 <= cell < len(self) and not self.walls[cell >> 3] >> (cell & 7) & 1
+
+    def _row_masks(self, row):
+        """
+        Returns (walls, right stops, left stops, turns) for a row as int
+        bitmasks over its columns, computed once per solve.
+
+        A column is a stop for a direction if it is a wall, the goal, or
+        a cell where entering it that way opens a vertical move that was
+        blocked one column back. A column is in turns if a horizontal jump
+        from it in either direction reaches a jump point.
+        """
+        masks = self._rows.get(row)
+        if masks is not None:
+            return masks
+        width = self.width
+        full = (1 << width) - 1
+
+        def open_columns(r):
+            if not 0 <= r < self.height:
+                return 0
+            first = r * width
+            chunk = int.from_bytes(
+                self.walls[first >> 3:(first + width + 7) >> 3], "little"
+            )
+            return ~(chunk >> (first & 7)) & full
+
+        here = open_columns(row)
+        walls = ~here & full
+        right = walls
+        left = walls
+        for adjacent in (open_columns(row - 1), open_columns(row + 1)):
+            right |= here & adjacent & ~(adjacent << 1)
+            left |= here & adjacent & ~(adjacent >> 1)
+        if row == self.goal // width:
+            right |= 1 << self.goal % width
+            left |= 1 << self.goal % width
+
+        # A jump succeeds if an open run leads to a stop that is not a
+        # wall, so smear those stops back along open cells, doubling the
+        # distance each round
+        toward_right = right & here
+        toward_left = left & here
+        run_right = here
+        run_left = here
+        shift = 1
+        while shift < width:
+            toward_right |= run_right & (toward_right >> shift)
+            toward_left |= run_left & (toward_left << shift)
+            run_right &= run_right >> shift
+            run_left &= run_left << shift
+            shift <<= 1
+        turns = here & ((toward_right >> 1) | (toward_left << 1))
+
+        masks = (walls, right, left, turns)
+        self._rows[row] = masks
+        return masks
+
+    def _jump_horizontal(self, cell, step):
+        """
+        Moves from `cell` by `step` (1 or -1) until reaching the goal or a
+        cell where a vertical move opens up that was blocked one step back.
+        Returns that jump point, or None on hitting a wall or the edge.
+
+        The scan is a single bit search over the row's masks rather than
+        a walk cell by cell.
+        """
+        row, col = divmod(cell, self.width)
+        walls, right, left, _ = self._row_masks(row)
+        if step == 1:
+            ahead = right >> (col + 1)
+            if not ahead:
+                return None
+            found = col + (ahead & -ahead).bit_length()
+        else:
+            behind = left & ((1 << col) - 1)
+            if not behind:
+                return None
+            found = behind.bit_length() - 1
+        if walls >> found & 1:
+            return None
+        return row * self.width + found
+
+    def _jump_vertical(self, cell, step):
+        """
+        Moves from `cell` by `step` (one row up or down) until reaching the
+        goal or a cell from which a horizontal jump finds a jump point.
+        Returns that jump point, or None on hitting a wall or the edge.
+        """
+        width = self.width
+        while True:
+            following = cell + step
+            if not self._open(following):
+                return None
+            if following == self.goal:
+                return following
+            row, col = divmod(following, width)
+            if self._row_masks(row)[3] >> col & 1:
+                return following
+            cell = following
+
+    def _jump_point_search(self, trace=None):
+        """
+        Jump Point Search for the 4-connected uniform grid, using A* over
+        jump points with the Manhattan heuristic.
+
+        Shortest paths are taken in a canonical form where a horizontal
+        run only turns vertical where that move was blocked one cell
+        earlier, and a vertical run may turn at any cell; jumps skip every
+        cell where no canonical path can turn, so only jump points are
+        pushed. The cells between jump points are filled into parents
+        afterwards so the solution reads like the other algorithms'.
+        """
+        width = self.width
+        directions = [(LEFT, -1), (RIGHT, 1), (UP, -width), (DOWN, width)]
+        self._rows = {}
+        steps = dict(directions)
+        reverse = {LEFT: RIGHT, RIGHT: LEFT, UP: DOWN, DOWN: UP, START: None}
+        jump_horizontal = self._jump_horizontal
+        jump_vertical = self._jump_vertical
+        if trace is not None:
+            jump_horizontal = trace.clocked(jump_horizontal)
+            jump_vertical = trace.clocked(jump_vertical)
+
+        # Maps each jump point to (previous jump point, direction entered)
+        came_from = {self.start: (None, START)}
+        cost = {self.start: 0}
+        closed = set()
+        counter = 0
+        queue = [(self.heuristic(self.start), counter, self.start)]
+        while queue:
+            _, _, cell = heapq.heappop(queue)
+            if cell in closed:
+                continue
+            closed.add(cell)
+            self._mark_explored(cell)
+            if trace is not None:
+                trace.expanded(len(queue), self.num_explored)
+            if cell == self.goal:
+                break
+
+            entered = came_from[cell][1]
+            for direction, step in directions:
+                if direction == reverse[entered]:
+                    continue
+                if direction in (LEFT, RIGHT):
+                    jump = jump_horizontal(cell, step)
+                else:
+                    jump = jump_vertical(cell, step)
+                if jump is None or jump in closed:
+                    continue
+                g = cost[cell] + abs(jump - cell) // abs(step)
+                if jump not in cost or g < cost[jump]:
+                    cost[jump] = g
+                    came_from[jump] = (cell, direction)
+                    counter += 1
+                    heapq.heappush(queue, (g + self.heuristic(jump), counter, jump))
+        else:
+            return False
+
+        # Fill in the straight runs between jump points
+        cell = self.goal
+        while came_from[cell][0] is not None:
+            previous, direction = came_from[cell]
+            step = steps[direction]
+            while cell != previous:
+                self.parents[cell] = direction
+                cell -= step
+        return True
+
+
+class GridBuilder():
+    """
+    Accumulates maze rows into a wall bitset, one row at a time.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.walls = bytearray()
+        self.rows = 0
+        self.bits = 0
+        self.start = None
+        self.goal = None
+
+    def add_row(self, line):
+        width = self.width
+        base = self.rows * width
+        needed = (base + width + 7) // 8
+        if len(self.walls) < needed:
+            self.walls.extend(bytes(needed - len(self.walls)))
+        walls = self.walls
+        for j, character in enumerate(line[:width]):
+            if character == " ":
+                continue
+            cell = base + j
+            if character == "A":
+                if self.start is not None:
+                    raise Exception("maze must have exactly one start point")
+                self.start = cell
+            elif character == "B":
+                if self.goal is not None:
+                    raise Exception("maze must have exactly one goal")
+                self.goal = cell
+            else:
+                walls[cell >> 3] |= 1 << (cell & 7)
+        self.rows += 1
+
+    def build(self, height=None):
+        if self.start is None:
+            raise Exception("maze must have exactly one start point")
+        if self.goal is None:
+            raise Exception("maze must have exactly one goal")
+        height = self.rows if height is None else height
+        return Grid(height, self.width, self.walls, self.start, self.goal)
+
+
+def main():
+    if len(sys.argv) not in [2, 3, 4]:
+        sys.exit(f"Usage: python grid.py maze.txt [{'|'.join(ALGORITHMS)}] [image.png]")
+    algorithm = sys.argv[2] if len(sys.argv) >= 3 else "bfs"
+
+    grid = Grid.from_file(sys.argv[1])
+    print("Solving...")
+    grid.solve(algorithm)
+    print("States Explored:", grid.num_explored)
+    print("Solution length:", len(grid.solution[1]))
+
+    if len(sys.argv) == 4:
+        cell_size, cell_border = image_scale(grid.height, grid.width)
+        grid.output_image(sys.argv[3], show_explored=True,
+                          cell_size=cell_size, cell_border=cell_border)
+
+
+if __name__ == "__main__":
+    main()
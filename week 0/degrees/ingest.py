@@ -0,0 +1,131 @@
+"""
+Streaming CSV ingestion for the degrees datasets.
+
+Rows are parsed positionally (no dictionary per row) in chunks, and the
+people and movies tables are read concurrently.
+"""
+import csv
+import operator
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Rows handed to the caller at a time when streaming
+CHUNK_SIZE = 100000
+
+PEOPLE_COLUMNS = ("id", "name", "birth")
+MOVIE_COLUMNS = ("id", "title", "year")
+STAR_COLUMNS = ("person_id", "movie_id")
+
+
+class Progress():
+    """
+    Reports rows read and rows/sec per file, at most every `interval` seconds.
+    """
+
+    def __init__(self, stream=sys.stderr, interval=1.0):
+        self.stream = stream
+        self.interval = interval
+        self.started = {}
+        self.reported = {}
+
+    def start(self, name):
+        self.started[name] = time.perf_counter()
+
+    def update(self, name, rows):
+        now = time.perf_counter()
+        start = self.started.setdefault(name, now)
+        if now - self.reported.get(name, start) >= self.interval:
+            self.reported[name] = now
+            self.report(name, rows, now - start)
+
+    def done(self, name, rows):
+        now = time.perf_counter()
+        start = self.started.setdefault(name, now)
+        self.report(name, rows, now - start, final=True)
+
+    def report(self, name, rows, elapsed, final=False):
+        rate = rows / elapsed if elapsed else 0
+        status = "done" if final else "..."
+        print(f"{name}: {rows:,} rows, {rate:,.0f} rows/s {status}",
+              file=self.stream)
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Yields lists of tuples holding `columns` of each row of a CSV file,
+    `chunk_size` rows at a time.
+    """
+    name = os.path.basename(path)
+    if progress is not None:
+        progress.start(name)
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+
+        # An empty file has no rows, like csv.DictReader would yield
+        if header is None:
+            if progress is not None:
+                progress.done(name, 0)
+            return
+        positions = [header.index(column) for column in columns]
+        getter = operator.itemgetter(*positions)
+        width = max(positions) + 1
+        rows = 0
+        chunk = []
+        for row in reader:
+
+            # Skip blank lines and pad short rows with None, like DictReader
+            if not row:
+                continue
+            if len(row) < width:
+                row += [None] * (width - len(row))
+            chunk.append(getter(row))
+            if len(chunk) == chunk_size:
+                rows += len(chunk)
+                yield chunk
+                chunk = []
+                if progress is not None:
+                    progress.update(name, rows)
+        rows += len(chunk)
+        if chunk:
+            yield chunk
+        if progress is not None:
+            progress.done(name, rows)
+
+
+def read_table(path, columns, progress=None):
+    """
+    Returns every row of a CSV file as a tuple of `columns`.
+    """
+    rows = []
+    for chunk in read_chunks(path, columns, progress=progress):
+        rows.extend(chunk)
+    return rows
+
+
+def read_people_and_movies(directory, progress=None):
+    """
+    Returns (people rows, movie rows), reading both files concurrently.
+
+    The csv module holds the GIL while parsing, so the overlap is mostly
+    in file reads; worker processes would spend more pickling the rows
+    back than they save.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        people = executor.submit(
+            read_table, f"{directory}/people.csv", PEOPLE_COLUMNS, progress
+        )
+        movies = executor.submit(
+            read_table, f"{directory}/movies.csv", MOVIE_COLUMNS, progress
+        )
+        return people.result(), movies.result()
+
+
+def stream_stars(directory, progress=None):
+    """
+    Yields chunks of (person_id, movie_id) tuples from stars.csv.
+    """
+    yield from read_chunks(f"{directory}/stars.csv", STAR_COLUMNS,
+                           progress=progress)
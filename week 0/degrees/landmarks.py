@@ -0,0 +1,263 @@
+"""
+Landmark distance index for the compact degrees graph.
+
+K high-degree people are chosen as landmarks and a breadth-first sweep from
+each records every person's degrees of separation to it. By the triangle
+inequality, for any landmark L
+
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t)
+
+which gives instant bounds for a query and an admissible A* heuristic.
+
+    python landmarks.py large [K]
+"""
+import heapq
+import os
+import struct
+import sys
+import time
+from array import array
+
+from graph import (SnapshotError, header_fresh, load_graph, load_snapshot,
+                   map_file, read_header, snapshot_fresh, snapshot_path)
+
+# Index file written next to the CSVs
+INDEX = "landmarks.index"
+INDEX_MAGIC = b"DEGLMRK\0"
+INDEX_VERSION = 1
+
+# Header: magic, version, number of landmarks, number of people
+HEADER = struct.Struct("<8sIII")
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+
+class LandmarkIndex():
+
+    def __init__(self, landmarks, distances, size):
+        # Person indices of the landmarks
+        self.landmarks = landmarks
+
+        # Flat K * size byte array: distances[k * size + p] is d(landmark k, p)
+        self.distances = distances
+        self.size = size
+
+        # Backing memory map, when loaded from disk
+        self.buffer = None
+
+    def distance(self, k, p):
+        return self.distances[k * self.size + p]
+
+    def bounds(self, s, t):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        person indices s and t. Upper is None if no landmark reaches both;
+        both are None if some landmark proves they are not connected.
+        """
+        lower = 0
+        upper = None
+        for k in range(len(self.landmarks)):
+            ds = self.distance(k, s)
+            dt = self.distance(k, t)
+            if ds == UNREACHABLE and dt == UNREACHABLE:
+                continue
+            if ds == UNREACHABLE or dt == UNREACHABLE:
+                return None, None
+            lower = max(lower, abs(ds - dt))
+            if upper is None or ds + dt < upper:
+                upper = ds + dt
+        return lower, upper
+
+    def heuristic(self, t):
+        """
+        Returns a function estimating the degrees from a person index to t,
+        or None for people that provably cannot reach t.
+        """
+        targets = [self.distance(k, t) for k in range(len(self.landmarks))]
+
+        def h(p):
+            estimate = 0
+            for k, dt in enumerate(targets):
+                dp = self.distance(k, p)
+                if dp == UNREACHABLE and dt == UNREACHABLE:
+                    continue
+                if dp == UNREACHABLE or dt == UNREACHABLE:
+                    return None
+                estimate = max(estimate, abs(dp - dt))
+            return estimate
+        return h
+
+
+def index_path(directory):
+    """
+    Returns the path of the landmark index for a data directory.
+    """
+    return os.path.join(directory, INDEX)
+
+
+def index_fresh(directory, size=None):
+    """
+    Returns True if the directory has a landmark index newer than its CSVs
+    that this version can read and, if `size` is given, that covers that
+    many people. Anything else is reported on stderr and treated as stale.
+    """
+    return header_fresh(directory, index_path(directory), check_header, size)
+
+
+def check_header(data, path, size=None):
+    """
+    Validates a landmark index header, returning (landmarks, people).
+    """
+    count, people = read_header(data, path, INDEX_MAGIC, INDEX_VERSION,
+                                "landmark index")
+    if size is not None and people != size:
+        raise SnapshotError(f"{path} covers {people} people, expected {size}")
+    return count, people
+
+
+def distances_from(graph, source):
+    """
+    Returns a byte array of degrees of separation from person index source
+    to every person, sweeping the bipartite graph so each movie is
+    scanned at most once.
+    """
+    distances = array("B", [UNREACHABLE]) * len(graph)
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer and depth < UNREACHABLE - 1:
+        depth += 1
+        next_layer = []
+        for p in layer:
+            for m in graph.movies_for(p):
+                if seen_movies[m]:
+                    continue
+                seen_movies[m] = 1
+                for q in graph.stars_for(m):
+                    if distances[q] == UNREACHABLE:
+                        distances[q] = depth
+                        next_layer.append(q)
+        layer = next_layer
+    return distances
+
+
+def choose_landmarks(graph, k):
+    """
+    Returns the k person indices with the most co-star appearances.
+    """
+    def degree(p):
+        return sum(
+            len(graph.stars_for(m)) for m in graph.movies_for(p)
+        )
+    return heapq.nlargest(k, range(len(graph)), key=degree)
+
+
+def build_index(graph, k=16):
+    """
+    Returns a LandmarkIndex over k high-degree landmarks.
+    """
+    landmarks = choose_landmarks(graph, k)
+    distances = array("B")
+    for landmark in landmarks:
+        distances.extend(distances_from(graph, landmark))
+    return LandmarkIndex(array("i", landmarks), distances, len(graph))
+
+
+def save_index(index, path):
+    """
+    Write a LandmarkIndex to disk.
+    """
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION,
+                            len(index.landmarks), index.size))
+        f.write(struct.pack(f"<{len(index.landmarks)}i", *index.landmarks))
+        f.write(bytes(index.distances))
+    os.replace(temporary, path)
+
+
+def load_index(path, size=None):
+    """
+    Memory-map a landmark index file, raising SnapshotError if it cannot
+    be read or, when `size` is given, does not cover that many people.
+    """
+    buffer, view, (count, size) = map_file(path, check_header, size)
+
+    start = HEADER.size + 4 * count
+    landmarks = array("i", struct.unpack_from(f"<{count}i", view, HEADER.size))
+    index = LandmarkIndex(landmarks, view[start:start + count * size], size)
+    index.buffer = buffer
+    return index
+
+
+def landmark_path(graph, index, source, target, trace=None):
+    """
+    Returns the shortest list of (movie, person) index pairs from source
+    to target, found by A* with the landmark heuristic, or None.
+
+    If `trace` is given, record expansions and neighbor time in it.
+    """
+    neighbors = graph.neighbors
+    if trace is not None:
+        neighbors = trace.timed(neighbors)
+    h = index.heuristic(target)
+    if source == target or h(source) is None:
+        return None
+
+    # Maps each reached person to (movie, parent person)
+    parents = {source: None}
+    cost = {source: 0}
+    counter = 0
+    queue = [(h(source), counter, source)]
+    while queue:
+        _, _, p = heapq.heappop(queue)
+        if trace is not None:
+            trace.expanded(len(queue), len(cost))
+        if p == target:
+            path = []
+            while parents[p] is not None:
+                movie, parent = parents[p]
+                path.append((movie, p))
+                p = parent
+            path.reverse()
+            return path
+
+        g = cost[p] + 1
+        for m, q in neighbors(p):
+            if q in cost and cost[q] <= g:
+                continue
+            estimate = h(q)
+            if estimate is None:
+                continue
+            cost[q] = g
+            parents[q] = (m, p)
+            counter += 1
+            heapq.heappush(queue, (g + estimate, counter, q))
+    return None
+
+
+def main():
+    if len(sys.argv) not in [2, 3]:
+        sys.exit("Usage: python landmarks.py directory [K]")
+    directory = sys.argv[1]
+    k = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    print("Loading data...")
+    if snapshot_fresh(directory):
+        graph = load_snapshot(snapshot_path(directory))
+    else:
+        graph = load_graph(directory)
+
+    start = time.perf_counter()
+    index = build_index(graph, k)
+    elapsed = time.perf_counter() - start
+    path = index_path(directory)
+    save_index(index, path)
+    print(f"Built {len(index.landmarks)} landmarks in {elapsed:.2f}s.")
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,126 +1,130 @@
-import sys
+import argparse
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+from grid import ACTIONS, ALGORITHMS, Grid, NoSolution, image_scale
+from mazecache import SolutionCache
+from metrics import start_trace
+from util import Node, StackFrontier
 
 
-class StackFrontier():
-    def __init__(self):
-        self.frontier = []
+class WallRows():
+    """
+    Read-only rows of a grid's wall bitset, so maze.walls[i][j] works
+    without storing a list per cell.
+    """
 
-    def add(self, node):
-        self.frontier.append(node)
+    def __init__(self, grid):
+        self.grid = grid
 
-    def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+    def __len__(self):
+        return self.grid.height
 
-    def empty(self):
-        return len(self.frontier) == 0
+    def __getitem__(self, i):
+        if not 0 <= i < self.grid.height:
+            raise IndexError("maze row out of range")
+        base = i * self.grid.width
+        return [bool(self.grid.is_wall(base + j)) for j in range(self.grid.width)]
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
-            return node
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
 
 
-class QueueFrontier(StackFrontier):
+class ExploredCells():
+    """
+    Set-like view of an explored bitset (bit row * width + col), so
+    (i, j) in maze.explored and iterating over (row, col) cells keep
+    working. The bitset itself is available as `bits`.
+    """
+
+    def __init__(self, bits, height, width):
+        self.bits = bits
+        self.height = height
+        self.width = width
+
+    def __contains__(self, state):
+        row, col = state
+        if not (0 <= row < self.height and 0 <= col < self.width):
+            return False
+        cell = row * self.width + col
+        return bool(self.bits[cell >> 3] >> (cell & 7) & 1)
+
+    def __iter__(self):
+        for cell in range(self.height * self.width):
+            if self.bits[cell >> 3] >> (cell & 7) & 1:
+                yield divmod(cell, self.width)
+
+    def __len__(self):
+        return int.from_bytes(self.bits, "little").bit_count()
 
-    def remove(self):
-        if self.empty():
-            raise Exception("empty frontier")
-        else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
-            return node
 
 class Maze():
 
     def __init__(self, filename):
 
-        # Read file and set height and width of maze
-        with open(filename) as f:
-            contents = f.read()
-
-        # Validate start and goal
-        if contents.count("A") != 1:
-            raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
-            raise Exception("maze must have exactly one goal")
+        # Stream the file into a wall bitset, validating start and goal
+        self.filename = filename
+        self.grid = Grid.from_file(filename)
 
         # Determine height and width of maze
-        contents = contents.splitlines()
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents)
+        self.height = self.grid.height
+        self.width = self.grid.width
+        self.start = self.grid.position(self.grid.start)
+        self.goal = self.grid.position(self.grid.goal)
 
         # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
+        self.walls = WallRows(self.grid)
 
         self.solution = None
+        self.explored = None
 
 
     def print(self):
-        solution = self.solution[1] if self.solution is not None else None
+        solution = set(self.solution[1]) if self.solution is not None else None
         print()
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-                if col:
-                    print("█", end="")
+        for i in range(self.height):
+            base = i * self.width
+            line = []
+            for j in range(self.width):
+                if self.grid.is_wall(base + j):
+                    line.append("█")
                 elif (i, j) == self.start:
-                    print("A", end="")
+                    line.append("A")
                 elif (i, j) == self.goal:
-                    print("B", end="")
+                    line.append("B")
                 elif solution is not None and (i, j) in solution:
-                    print("*", end="")
+                    line.append("*")
                 else:
-                    print(" ", end="")
-            print()
+                    line.append(" ")
+            print("".join(line))
         print()
 
 
     def neighbors(self, state):
         row, col = state
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        return [
+            (ACTIONS[direction], divmod(cell, self.width))
+            for direction, cell in self.grid.neighbors(row * self.width + col)
         ]
 
-        result = []
-        for action, (r, c) in candidates:
-            if 0 <= r < self.height and 0 <= c < self.width and not self.walls[r][c]:
-                result.append((action, (r, c)))
-        return result
 
+    def solve(self, algorithm=None, cache=None):
+        """
+        Finds a solution to maze, if one exists.
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+        If `algorithm` is one of grid.ALGORITHMS, solve with the
+        grid engine instead of the generic frontier search. If `cache`
+        is a mazecache.SolutionCache, reuse a stored result for the same
+        file contents and algorithm instead of searching.
+        """
+        if cache is not None:
+            return self.solve_cached(algorithm, cache)
+        if algorithm is not None:
+            return self.solve_grid(algorithm)
 
         # Keep track of number of states explored
         self.num_explored = 0
+        trace = start_trace("maze", start=self.start, goal=self.goal)
+        neighbors = self.neighbors if trace is None else trace.timed(self.neighbors)
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
@@ -128,18 +132,31 @@ class Maze():
         frontier.add(start)
 
         # Initialize an empty explored set
-        self.explored = set()
+        explored = set()
+        self.explored = None
+        try:
+            self._frontier_search(frontier, explored, neighbors, trace)
+        finally:
+            self.explored = self.pack_explored(explored)
+
+
+    def _frontier_search(self, frontier, explored, neighbors, trace):
+        """Runs the frontier search loop for solve."""
 
         # Keep looping until solution found
         while True:
 
             # If nothing left in frontier, then no path
             if frontier.empty():
-                raise Exception("no solution")
+                if trace is not None:
+                    trace.finish(num_explored=self.num_explored, solved=False)
+                raise NoSolution("no solution")
 
             # Choose a node from the frontier
             node = frontier.remove()
             self.num_explored += 1
+            if trace is not None:
+                trace.expanded(len(frontier.frontier), self.num_explored)
 
             # If node is the goal, then we have a solution
             if node.state == self.goal:
@@ -152,78 +169,123 @@ class Maze():
                 actions.reverse()
                 cells.reverse()
                 self.solution = (actions, cells)
+                if trace is not None:
+                    trace.finish(num_explored=self.num_explored, solved=True,
+                                 length=len(cells))
                 return
 
             # Mark node as explored
-            self.explored.add(node.state)
+            explored.add(node.state)
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-                if not frontier.contains_state(state) and state not in self.explored:
+            for action, state in neighbors(node.state):
+                if not frontier.contains_state(state) and state not in explored:
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
 
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
-
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
-
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
-
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
+    def solve_cached(self, algorithm, cache):
+        """Finds a solution through a SolutionCache (see solve)."""
+        key = cache.file_key(self.filename, algorithm or "frontier")
+        entry = cache.get(key)
+        if entry is not None:
+            self.solution, explored, self.num_explored = entry
+            self.explored = self.view_explored(explored)
+            if self.solution is None:
+                raise NoSolution("no solution")
+            return
+
+        # Only a search that ran out of cells is recorded as unsolvable;
+        # other errors (an unknown algorithm, say) propagate uncached
+        try:
+            self.solve(algorithm)
+        except NoSolution:
+            cache.put(key, self.width, self.height, None,
+                      self.explored.bits, self.num_explored)
+            raise
+        cache.put(key, self.width, self.height, self.solution,
+                  self.explored.bits, self.num_explored)
+
+
+    def solve_grid(self, algorithm):
+        """Finds a solution with the grid engine (see grid.Grid.solve)."""
+        trace = start_trace("maze", start=self.start, goal=self.goal,
+                            algorithm=algorithm)
+        grid = self.grid
+        try:
+            self.solution = grid.solve(algorithm, trace=trace)
+        finally:
+            self.num_explored = grid.num_explored
+            self.explored = self.view_explored(grid.explored)
+            if trace is not None:
+                fields = {}
+                if self.solution is not None:
+                    fields["length"] = len(self.solution[1])
+                trace.finish(num_explored=self.num_explored,
+                             solved=self.solution is not None, **fields)
+
+
+    def pack_explored(self, cells):
+        """
+        Returns an ExploredCells view over a bitset of (row, col) cells.
+        """
+        bits = bytearray((self.height * self.width + 7) // 8)
+        for row, col in cells:
+            cell = row * self.width + col
+            bits[cell >> 3] |= 1 << (cell & 7)
+        return ExploredCells(bits, self.height, self.width)
+
+
+    def view_explored(self, bits):
+        """
+        Returns an ExploredCells view over an explored bitset, or None.
+        """
+        if bits is None:
+            return None
+        return ExploredCells(bits, self.height, self.width)
+
+
+    def is_explored(self, state):
+        """
+        Returns True if the last solve explored the (row, col) cell.
+        """
+        return self.explored is not None and state in self.explored
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False,
+                     cell_size=50, cell_border=2):
+        """Renders the maze to a PNG file (see render.output_image)."""
+        grid = self.grid
+        grid.solution = self.solution
+        grid.explored = None
+        if self.explored is not None:
+            grid.explored = self.explored.bits
+        grid.output_image(filename, show_solution=show_solution,
+                          show_explored=show_explored, cell_size=cell_size,
+                          cell_border=cell_border)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a maze.")
+    parser.add_argument("maze")
+    parser.add_argument("algorithm", nargs="?", choices=ALGORITHMS)
+    parser.add_argument("--cache", metavar="DIRECTORY",
+                        help="reuse solutions stored in this directory")
+    args = parser.parse_args()
+    cache = SolutionCache(args.cache) if args.cache is not None else None
+
+    m = Maze(args.maze)
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(args.algorithm, cache=cache)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    cell_size, cell_border = image_scale(m.height, m.width)
+    m.output_image("maze.png", show_explored=True,
+                   cell_size=cell_size, cell_border=cell_border)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+On-disk cache of maze solutions.
+
+Entries are keyed by a hash of the maze file contents (which fixes the
+walls, start and goal) plus the algorithm, and hold the solution path,
+explored bitset and explored count, zlib-compressed: actions as one byte
+each, cells as 32-bit indices and the explored set as a bitset. When the
+cache grows past its byte budget the least recently used entries go.
+"""
+import hashlib
+import os
+import struct
+import zlib
+from array import array
+
+# Header: version, width, height, num_explored, path length, solved
+HEADER = struct.Struct("<IIIqI?")
+VERSION = 2
+
+ACTIONS = ["up", "down", "left", "right"]
+
+
+class SolutionCache():
+
+    def __init__(self, directory, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(contents, algorithm):
+        """
+        Returns the cache key for maze file contents (bytes) and an algorithm.
+        """
+        digest = hashlib.sha256(contents)
+        digest.update(b"\0" + algorithm.encode("utf-8"))
+        return digest.hexdigest()
+
+    @staticmethod
+    def file_key(filename, algorithm):
+        """
+        Returns the same key as `key` for a file's contents, reading the
+        file in blocks rather than all at once.
+        """
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        digest.update(b"\0" + algorithm.encode("utf-8"))
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.sol")
+
+    def get(self, key):
+        """
+        Returns (solution, explored, num_explored) for a key, or None.
+        solution is None for a maze recorded as having no solution, and
+        explored is a bitset (bit row * width + col) in a bytearray.
+        """
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                data = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+        version, width, height, num_explored, length, solved = HEADER.unpack_from(data)
+        if version != VERSION:
+            return None
+
+        # Mark as recently used for eviction
+        os.utime(path)
+
+        position = HEADER.size
+        actions = [ACTIONS[code] for code in data[position:position + length]]
+        position += length
+        cells = array("I")
+        cells.frombytes(data[position:position + 4 * length])
+        position += 4 * length
+        explored = bytearray(data[position:])
+        if len(explored) != (width * height + 7) // 8:
+            return None
+
+        solution = None
+        if solved:
+            solution = (actions, [divmod(cell, width) for cell in cells])
+        return solution, explored, num_explored
+
+    def put(self, key, width, height, solution, explored, num_explored):
+        """
+        Stores a solve result; `solution` is (actions, cells) or None and
+        `explored` a bitset as returned by get.
+        """
+        actions, cells = solution if solution is not None else ([], [])
+
+        data = b"".join([
+            HEADER.pack(VERSION, width, height, num_explored, len(cells),
+                        solution is not None),
+            bytes(ACTIONS.index(action) for action in actions),
+            array("I", [row * width + col for row, col in cells]).tobytes(),
+            bytes(explored)
+        ])
+        path = self.path(key)
+        temporary = f"{path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(zlib.compress(data))
+        os.replace(temporary, path)
+        self.evict()
+
+    def evict(self):
+        """
+        Deletes least recently used entries until within max_bytes.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith(".sol"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
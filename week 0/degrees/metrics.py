@@ -0,0 +1,110 @@
+"""
+Optional instrumentation for the degrees and maze searches.
+
+Searches only collect metrics while at least one sink is registered.
+A sink is any callable taking one record, a dictionary such as
+
+    {"solver": "degrees", "mode": "bfs", "source": "102", "target": "158",
+     "expanded": 3, "peak_frontier": 9, "peak_explored": 3,
+     "neighbor_time": 0.00002, "bookkeeping_time": 0.00004,
+     "wall_time": 0.00006, "degrees": 2}
+"""
+import json
+import sys
+import time
+
+# Callables receiving each finished trace record
+sinks = []
+
+
+def add_sink(sink):
+    sinks.append(sink)
+    return sink
+
+
+def remove_sink(sink):
+    sinks.remove(sink)
+
+
+def json_lines(stream=sys.stderr):
+    """
+    Returns a sink writing each record as a JSON line to `stream`.
+    """
+    def sink(record):
+        stream.write(json.dumps(record) + "\n")
+        stream.flush()
+    return sink
+
+
+def start_trace(solver, **fields):
+    """
+    Returns a Trace for one query, or None if no sink is registered.
+    """
+    if not sinks:
+        return None
+    return Trace(solver, **fields)
+
+
+class Trace():
+
+    def __init__(self, solver, **fields):
+        self.record = {"solver": solver}
+        self.record.update(fields)
+        self.expanded_count = 0
+        self.peak_frontier = 0
+        self.peak_explored = 0
+        self.neighbor_time = 0.0
+        self.start = time.perf_counter()
+
+    def expanded(self, frontier, explored):
+        """
+        Records one node expansion, given the current frontier
+        and explored-set sizes.
+        """
+        self.expanded_count += 1
+        if frontier > self.peak_frontier:
+            self.peak_frontier = frontier
+        if explored > self.peak_explored:
+            self.peak_explored = explored
+
+    def timed(self, neighbors):
+        """
+        Wraps a neighbor function so time spent generating neighbors
+        is counted separately from search bookkeeping.
+        """
+        def wrapper(state):
+            start = time.perf_counter()
+            result = list(neighbors(state))
+            self.neighbor_time += time.perf_counter() - start
+            return result
+        return wrapper
+
+    def clocked(self, function):
+        """
+        Wraps any function so its time is counted as neighbor time,
+        returning its result unchanged.
+        """
+        def wrapper(*args):
+            start = time.perf_counter()
+            result = function(*args)
+            self.neighbor_time += time.perf_counter() - start
+            return result
+        return wrapper
+
+    def finish(self, **fields):
+        """
+        Completes the record and sends it to every sink.
+        """
+        wall_time = time.perf_counter() - self.start
+        self.record.update({
+            "expanded": self.expanded_count,
+            "peak_frontier": self.peak_frontier,
+            "peak_explored": self.peak_explored,
+            "neighbor_time": self.neighbor_time,
+            "bookkeeping_time": max(wall_time - self.neighbor_time, 0.0),
+            "wall_time": wall_time
+        })
+        self.record.update(fields)
+        for sink in list(sinks):
+            sink(self.record)
+        return self.record
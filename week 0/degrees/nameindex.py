@@ -0,0 +1,157 @@
+"""
+Prefix and typo-tolerant name search for the degrees datasets.
+
+Prefix search is a binary search over the sorted lowercase names; fuzzy
+search looks candidates up in a trigram index, using only the rarest
+trigrams of the query, and ranks them by trigram similarity.
+"""
+import bisect
+from array import array
+
+# Only the rarest trigrams of a query are used to find fuzzy candidates
+CANDIDATE_TRIGRAMS = 4
+
+# Candidates sharing the most trigrams are the only ones scored exactly
+MAX_CANDIDATES = 200
+
+
+class NameIndex():
+
+    def __init__(self, keys, record):
+        # Sorted lowercase names
+        self.keys = keys
+
+        # Function mapping a position in keys to (person_id, name, birth)
+        self.record = record
+
+        # Maps trigrams to positions of the distinct keys containing them
+        self.trigrams = None
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to `limit` positions whose name starts with `prefix`,
+        in name order.
+        """
+        prefix = prefix.lower()
+        i = bisect.bisect_left(self.keys, prefix)
+        positions = []
+        while (len(positions) < limit and i < len(self.keys)
+               and self.keys[i].startswith(prefix)):
+            positions.append(i)
+            i += 1
+        return positions
+
+    def build_trigrams(self):
+        trigrams = {}
+        previous = None
+        for i, key in enumerate(self.keys):
+            if key == previous:
+                continue
+            previous = key
+            for trigram in set(_trigrams(key)):
+                if trigram not in trigrams:
+                    trigrams[trigram] = array("i")
+                trigrams[trigram].append(i)
+        self.trigrams = trigrams
+
+    def fuzzy(self, query, limit=10):
+        """
+        Returns up to `limit` (similarity, position) pairs for names close
+        to `query`, most similar first. Every person sharing a
+        matched name is included.
+        """
+        if self.trigrams is None:
+            self.build_trigrams()
+        query = query.lower()
+        wanted = set(_trigrams(query))
+        postings = sorted(
+            (self.trigrams[trigram] for trigram in wanted if trigram in self.trigrams),
+            key=len
+        )
+
+        hits = {}
+        for posting in postings[:CANDIDATE_TRIGRAMS]:
+            for i in posting:
+                hits[i] = hits.get(i, 0) + 1
+        candidates = hits
+        if len(hits) > MAX_CANDIDATES:
+            candidates = sorted(hits, key=hits.get, reverse=True)[:MAX_CANDIDATES]
+
+        scored = []
+        for i in candidates:
+            found = set(_trigrams(self.keys[i]))
+            scored.append((len(wanted & found) / len(wanted | found), i))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+
+        results = []
+        for similarity, i in scored:
+            key = self.keys[i]
+            while i < len(self.keys) and self.keys[i] == key:
+                results.append((similarity, i))
+                i += 1
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def search(self, query, limit=10, fuzzy=True):
+        """
+        Returns up to `limit` candidates for `query` as dictionaries of
+        id, name, birth and score: exact matches first, then prefix
+        matches, then (if `fuzzy`) names with similar spelling.
+        """
+        key = query.lower()
+        seen = set()
+        ranked = []
+        for i in self.prefix(key, limit):
+            score = 1.0 if self.keys[i] == key else len(key) / len(self.keys[i])
+            ranked.append((score, i))
+            seen.add(i)
+        if fuzzy and len(ranked) < limit:
+            for similarity, i in self.fuzzy(key, limit):
+                if i not in seen:
+                    # Fuzzy matches always rank below prefix matches
+                    ranked.append((similarity / 2, i))
+                    seen.add(i)
+        ranked.sort(key=lambda pair: -pair[0])
+
+        candidates = []
+        for score, i in ranked[:limit]:
+            person_id, name, birth = self.record(i)
+            candidates.append({
+                "id": person_id,
+                "name": name,
+                "birth": birth,
+                "score": round(score, 3)
+            })
+        return candidates
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def index_for_graph(graph):
+    """
+    Returns a NameIndex over a StarGraph's sorted name keys.
+    """
+    def record(i):
+        p = graph.name_people[i]
+        return graph.person_ids[p], graph.person_names[p], graph.person_births[p]
+    return NameIndex(graph.name_keys, record)
+
+
+def index_for_people(people):
+    """
+    Returns a NameIndex over the degrees people dictionary.
+    """
+    entries = sorted(
+        (person["name"].lower(), person_id) for person_id, person in people.items()
+    )
+    keys = [key for key, _ in entries]
+    person_ids = [person_id for _, person_id in entries]
+
+    def record(i):
+        person = people[person_ids[i]]
+        return person_ids[i], person["name"], person["birth"]
+    return NameIndex(keys, record)
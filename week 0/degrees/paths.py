@@ -0,0 +1,146 @@
+"""
+Enumerating alternative connection chains between two people.
+
+Both generators work on whichever store degrees.load_data filled and
+yield paths in the same (movie_id, person_id) format as
+degrees.shortest_path, lazily, so callers can stop early.
+"""
+import heapq
+import itertools
+
+import degrees
+
+
+def all_shortest_paths(source, target, max_states=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs from source
+    to target.
+
+    A breadth-first sweep records, for each person, every (movie, person)
+    that reaches it from the previous layer; paths are then walked back
+    from the target over that layered DAG. Raises an exception if more
+    than `max_states` people would need to be kept in memory.
+    """
+    source, target, expand = degrees.search_space(source, target)
+    if source == target:
+        return
+
+    # Maps each reached state to its layer and every parent (movie, state)
+    depth = {source: 0}
+    parents = {source: []}
+    layer = [source]
+    found = False
+    while layer and not found:
+        next_layer = []
+        for state in layer:
+            for movie, person in expand(state):
+                if person not in depth:
+                    depth[person] = depth[state] + 1
+                    parents[person] = []
+                    next_layer.append(person)
+                    if max_states is not None and len(depth) > max_states:
+                        raise Exception(f"search exceeded {max_states} states")
+                if depth[person] == depth[state] + 1:
+                    parents[person].append((movie, state))
+                if person == target:
+                    found = True
+        layer = next_layer
+    if not found:
+        return
+
+    # Depth-first walk back from the target, one parent choice per level
+    stack = [(target, [])]
+    while stack:
+        state, suffix = stack.pop()
+        if state == source:
+            yield degrees.ids_for_path(suffix)
+            continue
+        for movie, parent in reversed(parents[state]):
+            stack.append((parent, [(movie, state)] + suffix))
+
+
+def k_shortest_paths(source, target, k=None, max_candidates=None):
+    """
+    Yields simple (no repeated person) lists of (movie_id, person_id)
+    pairs from source to target in order of increasing length, up to `k`
+    of them, using Yen's algorithm over breadth-first searches.
+
+    Candidate paths beyond `max_candidates` are discarded (longest first).
+    """
+    if k is not None and k < 1:
+        return
+    source, target, expand = degrees.search_space(source, target)
+    if source == target:
+        return
+
+    path = _blocked_path(source, target, expand, set(), set())
+    if path is None:
+        return
+    found = [path]
+    yield degrees.ids_for_path(path)
+
+    candidates = []
+    seen = {tuple(path)}
+    counter = itertools.count()
+    for _ in itertools.count(1) if k is None else range(1, k):
+        previous = found[-1]
+        states = [source] + [person for _, person in previous]
+
+        for i in range(len(previous)):
+            spur = states[i]
+            root = previous[:i]
+
+            # Block the next step of every found path sharing this root
+            blocked_edges = set()
+            for other in found:
+                if other[:i] == root and len(other) > i:
+                    blocked_edges.add((spur,) + other[i])
+            blocked_states = set(states[:i])
+
+            spur_path = _blocked_path(spur, target, expand,
+                                      blocked_states, blocked_edges)
+            if spur_path is None:
+                continue
+            candidate = root + spur_path
+            if tuple(candidate) in seen:
+                continue
+            seen.add(tuple(candidate))
+            heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+        if max_candidates is not None and len(candidates) > max_candidates:
+            candidates = heapq.nsmallest(max_candidates, candidates)
+            heapq.heapify(candidates)
+        if not candidates:
+            return
+        _, _, path = heapq.heappop(candidates)
+        found.append(path)
+        yield degrees.ids_for_path(path)
+
+
+def _blocked_path(source, target, expand, blocked_states, blocked_edges):
+    """
+    Returns the shortest list of (movie, state) pairs from source to target
+    avoiding `blocked_states` and (state, movie, state) `blocked_edges`,
+    or None.
+    """
+    parents = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for state in layer:
+            for movie, person in expand(state):
+                if (person in parents or person in blocked_states
+                        or (state, movie, person) in blocked_edges):
+                    continue
+                parents[person] = (movie, state)
+                if person == target:
+                    path = []
+                    while parents[person] is not None:
+                        movie, parent = parents[person]
+                        path.append((movie, person))
+                        person = parent
+                    path.reverse()
+                    return path
+                next_layer.append(person)
+        layer = next_layer
+    return None
@@ -0,0 +1,168 @@
+"""
+Bitboard tic-tac-toe engine.
+
+A position is two 9-bit integers, one per player, with cell (i, j) at bit
+3 * i + j. Wins are checked against 8 precomputed line masks and minimax
+values are memoized in a transposition table keyed by the position's
+canonical form under the 8 board symmetries.
+"""
+X = "X"
+O = "O"
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = [
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+]
+
+# Each symmetry maps (i, j) to another cell
+SYMMETRIES = [
+    lambda i, j: (i, j),
+    lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j),
+    lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j),
+    lambda i, j: (2 - i, j),
+    lambda i, j: (j, i),
+    lambda i, j: (2 - j, 2 - i)
+]
+
+
+def _symmetry_table(symmetry):
+    """
+    Returns a list mapping every 9-bit mask to its image under a symmetry.
+    """
+    table = []
+    for mask in range(1 << 9):
+        image = 0
+        for bit in range(9):
+            if mask >> bit & 1:
+                i, j = symmetry(*divmod(bit, 3))
+                image |= 1 << (3 * i + j)
+        table.append(image)
+    return table
+
+
+SYMMETRY_TABLES = [_symmetry_table(symmetry) for symmetry in SYMMETRIES]
+
+# Maps canonical positions to their minimax value for X (1, 0 or -1)
+transpositions = {}
+
+# Maps exact positions to the best (i, j) for the player to move
+best_moves = {}
+
+
+def encode(board):
+    """
+    Returns (x, o) bitboards for a nested-list board.
+    """
+    x = 0
+    o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (3 * i + j)
+            elif cell == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def canonical(x, o):
+    """
+    Returns one integer key shared by all symmetric images of a position.
+    """
+    return min(table[x] << 9 | table[o] for table in SYMMETRY_TABLES)
+
+
+def won(bits):
+    for mask in WIN_MASKS:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def x_to_move(x, o):
+    return bin(x).count("1") == bin(o).count("1")
+
+
+def value(x, o):
+    """
+    Returns the minimax value of a position for X: 1 win, 0 draw, -1 loss.
+    """
+    if won(x):
+        return 1
+    if won(o):
+        return -1
+    occupied = x | o
+    if occupied == FULL:
+        return 0
+
+    key = canonical(x, o)
+    try:
+        return transpositions[key]
+    except KeyError:
+        pass
+
+    if x_to_move(x, o):
+        best = -1
+        for bit in range(9):
+            move = 1 << bit
+            if not occupied & move:
+                best = max(best, value(x | move, o))
+                if best == 1:
+                    break
+    else:
+        best = 1
+        for bit in range(9):
+            move = 1 << bit
+            if not occupied & move:
+                best = min(best, value(x, o | move))
+                if best == -1:
+                    break
+    transpositions[key] = best
+    return best
+
+
+def best_move(x, o):
+    """
+    Returns the optimal bit for the player to move, or None if the game
+    is over. Ties go to the lowest cell.
+    """
+    try:
+        return best_moves[x, o]
+    except KeyError:
+        pass
+    if won(x) or won(o) or x | o == FULL:
+        return None
+
+    occupied = x | o
+    maximizing = x_to_move(x, o)
+    best = None
+    best_value = None
+    for bit in range(9):
+        move = 1 << bit
+        if occupied & move:
+            continue
+        if maximizing:
+            child = value(x | move, o)
+        else:
+            child = value(x, o | move)
+        if best_value is None or (child > best_value if maximizing else child < best_value):
+            best = bit
+            best_value = child
+    best_moves[x, o] = best
+    return best
+
+
+def minimax(board):
+    """
+    Returns the optimal action (i, j) for the current player on a
+    nested-list board, or None if the game is over.
+    """
+    bit = best_move(*encode(board))
+    if bit is None:
+        return None
+    return divmod(bit, 3)
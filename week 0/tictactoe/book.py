@@ -0,0 +1,154 @@
+"""
+Perfect-play opening book for tic-tac-toe.
+
+Every position reachable from the empty board is solved once and stored in
+book.bin as one 32-bit record per position:
+
+    bits 0-17   position key, x << 9 | o
+    bits 18-19  value for X plus one (0 loss, 1 draw, 2 win)
+    bits 20-28  mask of optimal cells for the player to move
+
+The book is loaded lazily on the first lookup; if the file is missing,
+lookups return None and callers fall back to search.
+
+    python book.py
+"""
+import os
+import struct
+from array import array
+
+import bitboard
+
+BOOK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "book.bin")
+BOOK_MAGIC = b"TTTBOOK\0"
+BOOK_VERSION = 1
+
+# Header: magic, version, number of records
+HEADER = struct.Struct("<8sII")
+
+# Maps position keys to (value, optimal cell mask), once loaded
+entries = None
+
+
+def reachable():
+    """
+    Returns every (x, o) position reachable from the empty board.
+    """
+    seen = set()
+    stack = [(0, 0)]
+    while stack:
+        x, o = stack.pop()
+        if (x, o) in seen:
+            continue
+        seen.add((x, o))
+        if bitboard.won(x) or bitboard.won(o) or x | o == bitboard.FULL:
+            continue
+        occupied = x | o
+        for bit in range(9):
+            move = 1 << bit
+            if occupied & move:
+                continue
+            if bitboard.x_to_move(x, o):
+                stack.append((x | move, o))
+            else:
+                stack.append((x, o | move))
+    return seen
+
+
+def solve(x, o):
+    """
+    Returns (value for X, mask of every optimal cell) for a position.
+    """
+    value = bitboard.value(x, o)
+    occupied = x | o
+    if bitboard.won(x) or bitboard.won(o) or occupied == bitboard.FULL:
+        return value, 0
+
+    maximizing = bitboard.x_to_move(x, o)
+    mask = 0
+    for bit in range(9):
+        move = 1 << bit
+        if occupied & move:
+            continue
+        if maximizing:
+            child = bitboard.value(x | move, o)
+        else:
+            child = bitboard.value(x, o | move)
+        if child == value:
+            mask |= move
+    return value, mask
+
+
+def build_book(path=BOOK):
+    """
+    Solves every reachable position and writes the book file.
+    """
+    records = array("I")
+    for x, o in sorted(reachable()):
+        value, mask = solve(x, o)
+        records.append((x << 9 | o) | (value + 1) << 18 | mask << 20)
+    if records.itemsize != 4:
+        raise Exception("need a 32-bit unsigned array type")
+
+    temporary = f"{path}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(BOOK_MAGIC, BOOK_VERSION, len(records)))
+        f.write(records.tobytes())
+    os.replace(temporary, path)
+    return len(records)
+
+
+def load_book(path=BOOK):
+    """
+    Returns the book as a dictionary, or an empty one if the file is missing
+    or unreadable.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, count = HEADER.unpack_from(data)
+    except (OSError, struct.error):
+        return {}
+    if magic != BOOK_MAGIC or version != BOOK_VERSION:
+        return {}
+
+    records = struct.unpack_from(f"<{count}I", data, HEADER.size)
+    return {
+        record & 0x3ffff: ((record >> 18 & 0b11) - 1, record >> 20 & bitboard.FULL)
+        for record in records
+    }
+
+
+def lookup(x, o):
+    """
+    Returns (value for X, optimal cell mask) for a position, or None if
+    the position or the book itself is missing.
+    """
+    global entries
+    if entries is None:
+        entries = load_book()
+    return entries.get(x << 9 | o)
+
+
+def best_action(board):
+    """
+    Returns (found, action): found is False if the board is not in the
+    book, and action is the lowest optimal (i, j), or None if the game
+    is over.
+    """
+    entry = lookup(*bitboard.encode(board))
+    if entry is None:
+        return False, None
+    _, mask = entry
+    if not mask:
+        return True, None
+    return True, divmod((mask & -mask).bit_length() - 1, 3)
+
+
+def main():
+    count = build_book()
+    print(f"Wrote {BOOK} ({count} positions, {os.path.getsize(BOOK)} bytes).")
+
+
+if __name__ == "__main__":
+    main()
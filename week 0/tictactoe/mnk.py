@@ -0,0 +1,337 @@
+"""
+Generalized m,n,k game engine: an m x n board where k in a row wins.
+
+Boards are the same nested lists tictactoe.py uses. Positions are searched
+as two bitboards (bit i * n + j for cell (i, j)) with negamax alpha-beta
+under iterative deepening and a time budget, ordering moves by the
+transposition table's best move, then killer moves, then the history
+heuristic, and scoring cutoff positions by counting open k-windows.
+"""
+import argparse
+import time
+
+X = "X"
+O = "O"
+EMPTY = None
+
+# Score for a win found `ply` moves from the root is WIN - ply
+WIN = 1000000
+
+# Nodes between deadline checks
+CHECK_EVERY = 1024
+
+# Transposition table bound types
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def initial_state(rows=3, cols=3):
+    """
+    Returns an empty rows x cols board.
+    """
+    return [[EMPTY] * cols for _ in range(rows)]
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {
+        (i, j)
+        for i, row in enumerate(board)
+        for j, cell in enumerate(row)
+        if cell == EMPTY
+    }
+
+
+def winner(board, k=3):
+    """
+    Returns the player with k in a row on the board, if there is one.
+    """
+    engine = engine_for(len(board), len(board[0]), k)
+    x, o = engine.encode(board)
+    if engine.won(x):
+        return X
+    if engine.won(o):
+        return O
+    return None
+
+
+def minimax(board, k=3, time_limit=1.0, max_depth=None):
+    """
+    Returns the best action (i, j) found for the current player within
+    `time_limit` seconds (and `max_depth` plies, if given), or None if
+    the game is over.
+    """
+    engine = engine_for(len(board), len(board[0]), k)
+    move, _, _ = engine.search(board, time_limit=time_limit, max_depth=max_depth)
+    return move
+
+
+# Engines, and with them their transposition tables, by (rows, cols, k)
+engines = {}
+
+
+def engine_for(rows, cols, k):
+    key = (rows, cols, k)
+    if key not in engines:
+        engines[key] = Engine(rows, cols, k)
+    return engines[key]
+
+
+class Engine():
+
+    def __init__(self, rows, cols, k):
+        if k > max(rows, cols):
+            raise ValueError("k cannot exceed the board size")
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.size = rows * cols
+        self.full = (1 << self.size) - 1
+
+        # Every k-window as a bitmask, and the windows through each cell
+        self.windows = []
+        for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+            for i in range(rows):
+                for j in range(cols):
+                    end_i = i + di * (k - 1)
+                    end_j = j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        mask = 0
+                        for step in range(k):
+                            mask |= 1 << ((i + di * step) * cols + j + dj * step)
+                        self.windows.append(mask)
+        self.cell_windows = [
+            [mask for mask in self.windows if mask >> cell & 1]
+            for cell in range(self.size)
+        ]
+
+        # Central cells first when nothing else orders moves
+        center_i, center_j = (rows - 1) / 2, (cols - 1) / 2
+        self.cells = sorted(
+            range(self.size),
+            key=lambda cell: abs(cell // cols - center_i) + abs(cell % cols - center_j)
+        )
+
+        # Maps (mover bits, other bits) to (depth, score, bound, best cell)
+        self.transpositions = {}
+        self.history = [0] * self.size
+        self.killers = []
+        self.nodes = 0
+        self.deadline = None
+
+    def encode(self, board):
+        x = 0
+        o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.cols + j)
+                elif cell == O:
+                    o |= 1 << (i * self.cols + j)
+        return x, o
+
+    def won(self, bits):
+        for mask in self.windows:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def wins_at(self, bits, cell):
+        """
+        Returns True if `bits` has k in a row through `cell`.
+        """
+        for mask in self.cell_windows[cell]:
+            if bits & mask == mask:
+                return True
+        return False
+
+    def evaluate(self, me, other):
+        """
+        Scores a position for the side to move: each window open to only
+        one side counts 10^(stones in it) for that side.
+        """
+        score = 0
+        for mask in self.windows:
+            mine = me & mask
+            theirs = other & mask
+            if mine and not theirs:
+                score += 10 ** bin(mine).count("1")
+            elif theirs and not mine:
+                score -= 10 ** bin(theirs).count("1")
+        return score
+
+    def ordered_moves(self, me, other, ply, first):
+        occupied = me | other
+        moves = [cell for cell in self.cells if not occupied >> cell & 1]
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+
+        def priority(cell):
+            if cell == first:
+                return (0, 0)
+            if cell in killers:
+                return (1, 0)
+            return (2, -self.history[cell])
+        moves.sort(key=priority)
+        return moves
+
+    def search(self, board, time_limit=1.0, max_depth=None):
+        """
+        Returns (action, score, depth) for the player to move, where depth
+        is the deepest fully completed iteration. action is None if the
+        game is over.
+        """
+        x, o = self.encode(board)
+        if self.won(x) or self.won(o) or x | o == self.full:
+            return None, 0, 0
+        x_moves = bin(x).count("1") == bin(o).count("1")
+        me, other = (x, o) if x_moves else (o, x)
+
+        empties = self.size - bin(x | o).count("1")
+        limit = empties if max_depth is None else min(max_depth, empties)
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+        self.killers = [[] for _ in range(empties + 1)]
+        self.nodes = 0
+
+        best = self.ordered_moves(me, other, 0, None)[0]
+        best_score = 0
+        completed = 0
+        for depth in range(1, limit + 1):
+            try:
+                score, cell = self.root(me, other, depth)
+            except SearchTimeout:
+                break
+            best, best_score, completed = cell, score, depth
+            if abs(score) >= WIN - self.size:
+                break
+        return divmod(best, self.cols), best_score, completed
+
+    def root(self, me, other, depth):
+        entry = self.transpositions.get((me, other))
+        first = entry[3] if entry is not None else None
+        alpha = -WIN - 1
+        best = None
+        for cell in self.ordered_moves(me, other, 0, first):
+            score = self.child_score(me, other, cell, depth, alpha, WIN + 1, 0)
+            if best is None or score > alpha:
+                alpha = score
+                best = cell
+        self.transpositions[(me, other)] = (depth, alpha, EXACT, best)
+        return alpha, best
+
+    def child_score(self, me, other, cell, depth, alpha, beta, ply):
+        """
+        Returns the score for the mover of playing `cell`.
+        """
+        mine = me | 1 << cell
+        if self.wins_at(mine, cell):
+            return WIN - ply - 1
+        return -self.negamax(other, mine, depth - 1, -beta, -alpha, ply + 1)
+
+    def negamax(self, me, other, depth, alpha, beta, ply):
+        self.nodes += 1
+        if self.deadline is not None and self.nodes % CHECK_EVERY == 0:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+
+        if me | other == self.full:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, other)
+
+        key = (me, other)
+        original_alpha = alpha
+        first = None
+        entry = self.transpositions.get(key)
+        if entry is not None:
+            entry_depth, score, bound, first = entry
+            score = _from_table(score, ply)
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return score
+                if bound == LOWER:
+                    alpha = max(alpha, score)
+                elif bound == UPPER:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+        best_score = -WIN - 1
+        best = None
+        for cell in self.ordered_moves(me, other, ply, first):
+            score = self.child_score(me, other, cell, depth, alpha, beta, ply)
+            if score > best_score:
+                best_score = score
+                best = cell
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                killers = self.killers[ply]
+                if cell not in killers:
+                    killers.insert(0, cell)
+                    del killers[2:]
+                self.history[cell] += depth * depth
+                break
+
+        if best_score <= original_alpha:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[key] = (depth, _to_table(best_score, ply), bound, best)
+        return best_score
+
+
+def _to_table(score, ply):
+    """
+    Stores win scores relative to the node rather than the root.
+    """
+    if score >= WIN - 1000:
+        return score + ply
+    if score <= -WIN + 1000:
+        return score - ply
+    return score
+
+
+def _from_table(score, ply):
+    if score >= WIN - 1000:
+        return score - ply
+    if score <= -WIN + 1000:
+        return score + ply
+    return score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine self-play on an m,n,k board")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("cols", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--time", type=float, default=1.0,
+                        help="seconds per move (default 1)")
+    args = parser.parse_args()
+
+    engine = engine_for(args.rows, args.cols, args.k)
+    board = initial_state(args.rows, args.cols)
+    turn = X
+    while True:
+        start = time.perf_counter()
+        move, score, depth = engine.search(board, time_limit=args.time)
+        if move is None:
+            break
+        board[move[0]][move[1]] = turn
+        print(f"{turn} plays {move} (depth {depth}, score {score}, "
+              f"{engine.nodes} nodes, {time.perf_counter() - start:.2f}s)")
+        turn = O if turn == X else X
+    for row in board:
+        print(" ".join(cell or "." for cell in row))
+    print(f"Winner: {winner(board, args.k) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Root-parallel minimax for m,n,k boards over a persistent process pool.
+
+The shallow iterations of iterative deepening run in the parent, exactly
+as mnk.Engine.search would run them. The final iteration searches the
+eldest root move serially to establish alpha (young brothers wait), then
+hands the younger moves to the workers, which read and raise a shared
+alpha bound as they finish. Every move that could tie the best is searched
+with a window just below alpha, so the action returned is the same one the
+serial search picks.
+
+    python parallel.py 4 4 4 --depth 7 --workers 1,2,4
+"""
+import argparse
+import multiprocessing
+import os
+import time
+
+import mnk
+
+# Per-worker engine, rebuilt for every new root search
+worker_engine = None
+worker_search = None
+shared_alpha = None
+
+
+class SearchPool():
+
+    def __init__(self, processes=None):
+        self.alpha = multiprocessing.Value("q", 0)
+        self.pool = multiprocessing.Pool(
+            processes, initializer=_init, initargs=(self.alpha,)
+        )
+        self.searches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.pool.terminate()
+        self.pool.join()
+
+    def search(self, board, k=3, depth=None):
+        """
+        Returns (action, score) for the player to move, searching `depth`
+        plies (the rest of the game by default). action is None if the
+        game is over.
+        """
+        engine = mnk.Engine(len(board), len(board[0]), k)
+        x, o = engine.encode(board)
+        if engine.won(x) or engine.won(o) or x | o == engine.full:
+            return None, 0
+        x_moves = bin(x).count("1") == bin(o).count("1")
+        me, other = (x, o) if x_moves else (o, x)
+        empties = engine.size - bin(x | o).count("1")
+        limit = empties if depth is None else min(depth, empties)
+
+        # Shallow iterations serially; they also fill in the move ordering
+        move, score, _ = engine.search(board, time_limit=None, max_depth=limit - 1)
+        if abs(score) >= mnk.WIN - engine.size:
+            return move, score
+
+        entry = engine.transpositions.get((me, other))
+        first = entry[3] if entry is not None else None
+        moves = engine.ordered_moves(me, other, 0, first)
+
+        # Eldest brother
+        best = moves[0]
+        alpha = engine.child_score(me, other, best, limit, -mnk.WIN - 1, mnk.WIN + 1, 0)
+        self.alpha.value = alpha
+
+        # Younger brothers in parallel
+        self.searches += 1
+        tasks = [
+            (self.searches, engine.rows, engine.cols, k, me, other, cell, limit)
+            for cell in moves[1:]
+        ]
+        scores = dict(self.pool.imap_unordered(_search_move, tasks))
+
+        # Earliest move in search order with the highest score, as serially
+        for cell in moves[1:]:
+            if scores[cell] > alpha:
+                alpha = scores[cell]
+                best = cell
+        return divmod(best, engine.cols), alpha
+
+
+def _init(alpha):
+    global shared_alpha
+    shared_alpha = alpha
+
+
+def _search_move(task):
+    """
+    Returns (cell, score) for one root move. The score is exact whenever
+    it is at least the alpha bound seen when the search started.
+    """
+    global worker_engine, worker_search
+    search, rows, cols, k, me, other, cell, depth = task
+    if search != worker_search:
+        worker_engine = mnk.Engine(rows, cols, k)
+        worker_engine.killers = [[] for _ in range(worker_engine.size + 1)]
+        worker_search = search
+    alpha = shared_alpha.value
+    score = worker_engine.child_score(me, other, cell, depth, alpha - 1, mnk.WIN + 1, 0)
+    with shared_alpha.get_lock():
+        if score > shared_alpha.value:
+            shared_alpha.value = score
+    return cell, score
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark serial vs root-parallel search")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("cols", type=int)
+    parser.add_argument("k", type=int)
+    parser.add_argument("--depth", type=int, default=None,
+                        help="plies to search (default: rest of the game)")
+    parser.add_argument("--workers", default=None,
+                        help="comma-separated worker counts (default: 1,2,...,CPUs)")
+    parser.add_argument("--moves", type=int, default=0,
+                        help="engine moves to play before searching (default 0)")
+    args = parser.parse_args()
+
+    if args.workers is None:
+        counts = sorted({2 ** i for i in range(os.cpu_count().bit_length())} | {os.cpu_count()})
+    else:
+        counts = [int(count) for count in args.workers.split(",")]
+
+    # Reach a deeper position by letting the engine play a few quick moves
+    board = mnk.initial_state(args.rows, args.cols)
+    opening = mnk.Engine(args.rows, args.cols, args.k)
+    turn = mnk.X
+    for _ in range(args.moves):
+        move, _, _ = opening.search(board, time_limit=None, max_depth=2)
+        if move is None:
+            break
+        board[move[0]][move[1]] = turn
+        turn = mnk.O if turn == mnk.X else mnk.X
+
+    start = time.perf_counter()
+    serial, score, _ = mnk.Engine(args.rows, args.cols, args.k).search(
+        board, time_limit=None, max_depth=args.depth
+    )
+    elapsed = time.perf_counter() - start
+    print(f"serial: {serial} score {score} in {elapsed:.3f}s")
+
+    for count in counts:
+        with SearchPool(count) as pool:
+            start = time.perf_counter()
+            action, score = pool.search(board, k=args.k, depth=args.depth)
+            seconds = time.perf_counter() - start
+        if action != serial:
+            raise Exception(f"{count} workers chose {action}, serial chose {serial}")
+        print(f"{count} workers: {action} score {score} in {seconds:.3f}s "
+              f"({elapsed / seconds:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Headless tic-tac-toe: batch position evaluation and self-play.
+
+    python selfplay.py play minimax random --games 1000
+    python selfplay.py play depth:2 minimax --games 200 --seed 1
+    python selfplay.py evaluate
+
+Agents are "minimax" (perfect play), "random" (uniform over legal moves)
+and "depth:N" (the m,n,k engine searching N plies with its heuristic).
+"""
+import argparse
+import random
+import time
+
+import bitboard
+import book
+import mnk
+import tictactoe as ttt
+
+
+def evaluate(boards):
+    """
+    Returns a list of (action, value) for each board: the optimal action
+    (i, j) for the player to move, or None if the game is over, and the
+    minimax value for X (1, 0 or -1). Positions share one cache, both
+    within a call and across calls.
+    """
+    results = {}
+    evaluated = []
+    for board in boards:
+        position = bitboard.encode(board)
+        if position not in results:
+            bit = bitboard.best_move(*position)
+            action = None if bit is None else divmod(bit, 3)
+            results[position] = (action, bitboard.value(*position))
+        evaluated.append(results[position])
+    return evaluated
+
+
+def make_agent(spec, rng):
+    """
+    Returns a function from board to action for an agent spec.
+    """
+    if spec == "minimax":
+        return ttt.minimax
+    if spec == "random":
+        return lambda board: rng.choice(sorted(ttt.actions(board)))
+    if spec.startswith("depth:"):
+        depth = int(spec[len("depth:"):])
+        engine = mnk.engine_for(3, 3, ttt.K)
+        return lambda board: engine.search(board, time_limit=None, max_depth=depth)[0]
+    raise Exception(f"unknown agent {spec}")
+
+
+def play(agent_x, agent_o):
+    """
+    Plays one game and returns the winner, or None for a draw.
+    """
+    board = ttt.initial_state()
+    agents = {ttt.X: agent_x, ttt.O: agent_o}
+    while not ttt.terminal(board):
+        board = ttt.result(board, agents[ttt.player(board)](board))
+    return ttt.winner(board)
+
+
+def simulate(x, o, games, seed=0):
+    """
+    Plays `games` games between agent specs `x` and `o` and returns
+    a dictionary of outcome counts, elapsed seconds and games per second.
+    """
+    rng = random.Random(seed)
+    agent_x = make_agent(x, rng)
+    agent_o = make_agent(o, rng)
+    outcomes = {ttt.X: 0, ttt.O: 0, None: 0}
+    start = time.perf_counter()
+    for _ in range(games):
+        outcomes[play(agent_x, agent_o)] += 1
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games,
+        "x_wins": outcomes[ttt.X],
+        "o_wins": outcomes[ttt.O],
+        "draws": outcomes[None],
+        "seconds": elapsed,
+        "games_per_second": games / elapsed if elapsed else float("inf")
+    }
+
+
+def decode(x, o):
+    return [
+        [ttt.X if x >> (3 * i + j) & 1 else ttt.O if o >> (3 * i + j) & 1 else ttt.EMPTY
+         for j in range(3)]
+        for i in range(3)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless tic-tac-toe")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    play_parser = commands.add_parser("play", help="self-play between two agents")
+    play_parser.add_argument("x", help="agent playing X")
+    play_parser.add_argument("o", help="agent playing O")
+    play_parser.add_argument("--games", type=int, default=1000)
+    play_parser.add_argument("--seed", type=int, default=0)
+
+    commands.add_parser("evaluate", help="evaluate every reachable position")
+    args = parser.parse_args()
+
+    if args.command == "play":
+        stats = simulate(args.x, args.o, args.games, args.seed)
+        print(f"{stats['games']} games in {stats['seconds']:.3f}s "
+              f"({stats['games_per_second']:.0f} games/s)")
+        print(f"X ({args.x}) wins: {stats['x_wins']}  "
+              f"O ({args.o}) wins: {stats['o_wins']}  draws: {stats['draws']}")
+    else:
+        boards = [decode(x, o) for x, o in book.reachable()]
+        start = time.perf_counter()
+        results = evaluate(boards)
+        elapsed = time.perf_counter() - start
+        print(f"{len(results)} positions in {elapsed:.3f}s "
+              f"({len(results) / elapsed:.0f} positions/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,17 @@ import itertools
 import math
 import copy
 
+import bitboard
+import book
+import mnk
+
 X = "X"
 O = "O"
 EMPTY = None
 
+# In a row needed to win
+K = 3
+
 
 def initial_state():
     """
@@ -49,13 +56,7 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    options = set()
-    for i in range(3):
-        for j in range(3):
-            if board[i][j] == EMPTY:
-                options.add((i,j))
-    return options
-    # raise NotImplementedError
+    return mnk.actions(board)
 
 
 def result(board, action):
@@ -88,47 +89,7 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-
-    # Count X and O in each row, if 3 then that player wins
-    for row in board:
-        row_X = row.count(X)
-        row_O = row.count(O)
-        if row_X == 3:
-            return X
-        elif row_O == 3:
-            return O
-
-    # Count X and O in each column, if 3 then that player wins
-    columns = []
-    for column in range(len(board)):
-        each_column = []
-        for row in board:
-            each_column.append(row[column])
-        columns.append(each_column)
-
-
-    for column in columns:
-        row_X = column.count(X)
-        row_O = column.count(O)
-        if row_X == 3:
-            return X
-        elif row_O == 3:
-            return O
-
-    # Checks diagonals
-    if board[0][0] == O and board[1][1] == O and board[2][2] == O:
-        return O
-    if board[0][0] == X and board[1][1] == X and board[2][2] == X:
-        return X
-    if board[0][2] == O and board[1][1] == O and board[2][0] == O:
-        return O
-    if board[0][2] == X and board[1][1] == X and board[2][0] == X:
-        return X
-
-    # No winner/tie
-    return None
-
-    # raise NotImplementedError
+    return mnk.winner(board, K)
 
 
 def terminal(board):
@@ -168,6 +129,21 @@ def utility(board):
 def minimax(board):
     """
     Returns the optimal action for the current player on the board.
+
+    Answered from the opening book when book.bin is present, otherwise
+    by the bitboard engine, which memoizes every position it has seen;
+    minimax_search is the original tree search.
+    """
+    found, action = book.best_action(board)
+    if found:
+        return action
+    return bitboard.minimax(board)
+
+
+def minimax_search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    searching the game tree with alpha-beta pruning.
     """
     possible_actions = actions(board)
     alpha = -math.inf
@@ -0,0 +1,398 @@
+"""
+Clause-form backend for logic.model_check.
+
+Sentences are Tseitin-encoded into CNF: every And/Or/Biconditional node
+gets a fresh variable tied to its operands by a few clauses, so the clause
+count stays linear in the size of the sentence. Knowledge entails a query
+exactly when knowledge and not-query together are unsatisfiable, which a
+CDCL solver (unit propagation over two watched literals, first-UIP clause
+learning, activity-ordered decisions with phase saving, restarts) decides.
+"""
+import heapq
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Conflicts before the first restart, and the growth factor after each
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# Activity decay, applied by growing the bump increment instead
+ACTIVITY_DECAY = 0.95
+
+
+class Encoder():
+    """
+    Builds CNF clauses over integer literals (negative for negation).
+    """
+
+    def __init__(self, solver):
+        self.solver = solver
+        self.variables = {}
+        self.literals = {}
+
+    def variable(self, name):
+        """
+        Returns the variable for a symbol name, creating it if needed.
+        """
+        if name not in self.variables:
+            self.variables[name] = self.solver.new_variable()
+        return self.variables[name]
+
+    def literal(self, sentence):
+        """
+        Returns a literal equivalent to `sentence`, adding the defining
+        clauses the first time a node is seen.
+        """
+        if isinstance(sentence, Symbol):
+            return self.variable(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.literal(sentence.operand)
+
+        key = id(sentence)
+        if key in self.literals:
+            return self.literals[key][0]
+
+        add = self.solver.add_clause
+        if isinstance(sentence, Implication):
+            operands = [-self.literal(sentence.antecedent),
+                        self.literal(sentence.consequent)]
+            v = self.solver.new_variable()
+            add([-v] + operands)
+            for operand in operands:
+                add([v, -operand])
+        elif isinstance(sentence, Or):
+            operands = [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            v = self.solver.new_variable()
+            add([-v] + operands)
+            for operand in operands:
+                add([v, -operand])
+        elif isinstance(sentence, And):
+            operands = [self.literal(conjunct) for conjunct in sentence.conjuncts]
+            v = self.solver.new_variable()
+            add([v] + [-operand for operand in operands])
+            for operand in operands:
+                add([-v, operand])
+        elif isinstance(sentence, Biconditional):
+            left = self.literal(sentence.left)
+            right = self.literal(sentence.right)
+            v = self.solver.new_variable()
+            add([-v, -left, right])
+            add([-v, left, -right])
+            add([v, left, right])
+            add([v, -left, -right])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        # Keep the node alive so its id is not reused while encoding
+        self.literals[key] = (v, sentence)
+        return v
+
+    def assert_true(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be true, without defining
+        variables for the top-level connectives.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.assert_true(conjunct)
+        elif isinstance(sentence, Or):
+            self.solver.add_clause(
+                [self.literal(disjunct) for disjunct in sentence.disjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.solver.add_clause([-self.literal(sentence.antecedent),
+                                    self.literal(sentence.consequent)])
+        elif isinstance(sentence, Not):
+            self.assert_false(sentence.operand)
+        else:
+            self.solver.add_clause([self.literal(sentence)])
+
+    def assert_false(self, sentence):
+        """
+        Adds clauses requiring `sentence` to be false.
+        """
+        if isinstance(sentence, Or):
+            for disjunct in sentence.disjuncts:
+                self.assert_false(disjunct)
+        elif isinstance(sentence, And):
+            self.solver.add_clause(
+                [-self.literal(conjunct) for conjunct in sentence.conjuncts]
+            )
+        elif isinstance(sentence, Implication):
+            self.assert_true(sentence.antecedent)
+            self.assert_false(sentence.consequent)
+        elif isinstance(sentence, Not):
+            self.assert_true(sentence.operand)
+        else:
+            self.solver.add_clause([-self.literal(sentence)])
+
+
+class Solver():
+
+    def __init__(self):
+        self.num_variables = 0
+
+        # Per variable (index 0 unused): decision level, reason clause
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [False]
+        self.activity = [0.0]
+
+        # Per literal, indexed directly so that -v wraps to the back half:
+        # True, False or None (unassigned); sized when solving starts
+        self.truth = None
+
+        self.clauses = []
+        self.units = []
+        self.watches = {}
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+        self.increment = 1.0
+        self.order = []
+
+        # False once an empty clause or a level-0 conflict is found
+        self.ok = True
+
+    def new_variable(self):
+        self.num_variables += 1
+        v = self.num_variables
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(False)
+        self.activity.append(0.0)
+        self.watches[v] = []
+        self.watches[-v] = []
+        heapq.heappush(self.order, (0.0, v))
+        return v
+
+    def add_clause(self, literals):
+        """
+        Adds a clause before solving. Returns False if the clauses are
+        already known to be unsatisfiable.
+        """
+        if self.truth is not None:
+            raise Exception("clauses must be added before solving")
+        if not self.ok:
+            return False
+        clause = []
+        for literal in literals:
+            if -literal in clause:
+                return True
+            if literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.units.append(clause[0])
+        else:
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        v = abs(literal)
+        self.truth[literal] = True
+        self.truth[-literal] = False
+        self.levels[v] = len(self.trail_limits)
+        self.reasons[v] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Runs unit propagation over the trail. Returns the index of a
+        conflicting clause, or None.
+        """
+        clauses = self.clauses
+        truth = self.truth
+        while self.propagated < len(self.trail):
+            false = -self.trail[self.propagated]
+            self.propagated += 1
+            watching = self.watches[false]
+            i = 0
+            while i < len(watching):
+                index = watching[i]
+                clause = clauses[index]
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if truth[first] is True:
+                    i += 1
+                    continue
+
+                # Move the watch to any literal that is not false
+                for k in range(2, len(clause)):
+                    if truth[clause[k]] is not False:
+                        clause[1], clause[k] = clause[k], false
+                        self.watches[clause[1]].append(index)
+                        watching[i] = watching[-1]
+                        watching.pop()
+                        break
+                else:
+                    i += 1
+                    if truth[first] is False:
+                        self.propagated = len(self.trail)
+                        return index
+                    self.assign(first, index)
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learnt clause, backjump level) for a conflict, learning
+        the first unique implication point. The asserting literal is first.
+        """
+        level = len(self.trail_limits)
+        learnt = [None]
+        seen = set()
+        pending = 0
+        literal = None
+        position = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        while True:
+            for other in clause:
+                v = abs(other)
+                if other == literal or v in seen or self.levels[v] == 0:
+                    continue
+                seen.add(v)
+                self.bump(v)
+                if self.levels[v] == level:
+                    pending += 1
+                else:
+                    learnt.append(other)
+
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learnt[0] = -literal
+        if len(learnt) == 1:
+            return learnt, 0
+
+        # Watch the literal from the highest remaining level second
+        deepest = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[deepest] = learnt[deepest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def bump(self, v):
+        self.activity[v] += self.increment
+        if self.activity[v] > 1e100:
+            self.activity = [a * 1e-100 for a in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[u], u) for u in range(1, self.num_variables + 1)
+                          if self.truth[u] is None]
+            heapq.heapify(self.order)
+        heapq.heappush(self.order, (-self.activity[v], v))
+
+    def backtrack(self, level):
+        if len(self.trail_limits) <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            v = abs(literal)
+            self.phases[v] = literal > 0
+            self.truth[literal] = None
+            self.truth[-literal] = None
+            self.reasons[v] = None
+            heapq.heappush(self.order, (-self.activity[v], v))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.propagated = limit
+
+    def decide(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        while self.order:
+            priority, v = heapq.heappop(self.order)
+            if self.truth[v] is None and -priority == self.activity[v]:
+                return v
+        for v in range(1, self.num_variables + 1):
+            if self.truth[v] is None:
+                return v
+        return None
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable, False otherwise.
+        """
+        if not self.ok:
+            return False
+        if self.truth is None:
+            self.truth = [None] * (2 * self.num_variables + 1)
+            for unit in self.units:
+                if self.truth[unit] is False:
+                    self.ok = False
+                    return False
+                if self.truth[unit] is None:
+                    self.assign(unit, None)
+        conflicts = 0
+        restart = RESTART_FIRST
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.assign(learnt[0], self.watch(learnt))
+                self.increment /= ACTIVITY_DECAY
+                conflicts += 1
+                if conflicts >= restart:
+                    conflicts = 0
+                    restart *= RESTART_GROWTH
+                    self.backtrack(0)
+                continue
+
+            v = self.decide()
+            if v is None:
+                return True
+            self.trail_limits.append(len(self.trail))
+            self.assign(v if self.phases[v] else -v, None)
+
+    def model(self):
+        """
+        Returns the satisfying assignment found by solve, by variable.
+        """
+        return {v: self.truth[v] for v in range(1, self.num_variables + 1)}
+
+
+def satisfiable(sentence):
+    """
+    Returns a satisfying model of `sentence` as a dictionary of symbol
+    names to values, or None if there is none.
+    """
+    solver = Solver()
+    encoder = Encoder(solver)
+    encoder.assert_true(sentence)
+    for name in sentence.symbols():
+        encoder.variable(name)
+    if not solver.solve():
+        return None
+    return {name: bool(solver.truth[v]) for name, v in encoder.variables.items()}
+
+
+def entails(knowledge, query):
+    """
+    Returns True if every model of `knowledge` satisfies `query`.
+    """
+    solver = Solver()
+    encoder = Encoder(solver)
+    encoder.assert_true(knowledge)
+    encoder.assert_false(query)
+    return not solver.solve()
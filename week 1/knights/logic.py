@@ -1,8 +1,21 @@
 import itertools
+import weakref
+
+# Shared Symbol, Not, Implication and Biconditional nodes, by class and
+# operand identity; And and Or are never shared since add mutates them
+_interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
 
+    # Cached hash, symbol set and formula, cleared when a descendant
+    # And/Or is mutated. _parents is None for nodes with no And/Or below
+    # them, which can never change; otherwise it maps id to parent node.
+    _hash = None
+    _symbols = None
+    _formula = None
+    _parents = None
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -20,6 +33,40 @@ class Sentence():
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def intern(cls, key):
+        """
+        Returns (node, created) for the shared node under `key`. A newly
+        created node is registered but empty; the caller fills it in.
+        """
+        node = _interned.get(key)
+        if node is not None:
+            return node, False
+        node = object.__new__(cls)
+        _interned[key] = node
+        return node, True
+
+    def adopt(self, *operands):
+        """
+        Registers this node as a parent of any operand that can change.
+        """
+        for operand in operands:
+            if operand._parents is not None:
+                if self._parents is None:
+                    self._parents = weakref.WeakValueDictionary()
+                operand._parents[id(self)] = self
+
+    def invalidate(self):
+        """
+        Clears the cached values of this node and everything above it.
+        """
+        self._hash = None
+        self._symbols = None
+        self._formula = None
+        if self._parents is not None:
+            for parent in list(self._parents.values()):
+                parent.invalidate()
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -44,14 +91,24 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    def __new__(cls, name):
+        node, created = cls.intern((cls, name))
+        if created:
+            node.name = name
+        return node
+
+    def __reduce__(self):
+        return (type(self), (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (
+            isinstance(other, Symbol) and self.name == other.name
+        )
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        if self._hash is None:
+            self._hash = hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -70,15 +127,26 @@ class Symbol(Sentence):
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        node, created = cls.intern((cls, id(operand)))
+        if created:
+            node.operand = operand
+            node.adopt(operand)
+        return node
+
+    def __reduce__(self):
+        return (type(self), (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        if self._hash is None:
+            self._hash = hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -87,10 +155,14 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        if self._formula is None:
+            self._formula = "¬" + Sentence.parenthesize(self.operand.formula())
+        return self._formula
 
     def symbols(self):
-        return self.operand.symbols()
+        if self._symbols is None:
+            self._symbols = frozenset(self.operand.symbols())
+        return set(self._symbols)
 
 
 class And(Sentence):
@@ -98,14 +170,23 @@ class And(Sentence):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
         self.conjuncts = list(conjuncts)
+        self._parents = weakref.WeakValueDictionary()
+        self.adopt(*conjuncts)
+
+    def __reduce__(self):
+        return (type(self), tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash(
+                ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
+            )
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -115,19 +196,39 @@ class And(Sentence):
 
     def add(self, conjunct):
         Sentence.validate(conjunct)
+        symbols = self._symbols
+        formula = self._formula
         self.conjuncts.append(conjunct)
+        self.adopt(conjunct)
+        self.invalidate()
+
+        # Extend this node's own caches rather than rebuilding them
+        if symbols is not None:
+            self._symbols = symbols.union(conjunct.symbols())
+        if formula is not None and len(self.conjuncts) > 2:
+            self._formula = (formula + " ∧ "
+                             + Sentence.parenthesize(conjunct.formula()))
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
+        if self._formula is None:
+            if len(self.conjuncts) == 1:
+                self._formula = self.conjuncts[0].formula()
+            else:
+                self._formula = " ∧ ".join(
+                    [Sentence.parenthesize(conjunct.formula())
+                     for conjunct in self.conjuncts]
+                )
+        return self._formula
 
     def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self._symbols is None:
+            self._symbols = frozenset(
+                set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+            )
+        return set(self._symbols)
 
 
 class Or(Sentence):
@@ -135,46 +236,92 @@ class Or(Sentence):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
         self.disjuncts = list(disjuncts)
+        self._parents = weakref.WeakValueDictionary()
+        self.adopt(*disjuncts)
+
+    def __reduce__(self):
+        return (type(self), tuple(self.disjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash(
+                ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
+            )
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
+    def add(self, disjunct):
+        Sentence.validate(disjunct)
+        symbols = self._symbols
+        formula = self._formula
+        self.disjuncts.append(disjunct)
+        self.adopt(disjunct)
+        self.invalidate()
+
+        # Extend this node's own caches rather than rebuilding them
+        if symbols is not None:
+            self._symbols = symbols.union(disjunct.symbols())
+        if formula is not None and len(self.disjuncts) > 2:
+            self._formula = (formula + " ∨  "
+                             + Sentence.parenthesize(disjunct.formula()))
+
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
+        if self._formula is None:
+            if len(self.disjuncts) == 1:
+                self._formula = self.disjuncts[0].formula()
+            else:
+                self._formula = " ∨  ".join(
+                    [Sentence.parenthesize(disjunct.formula())
+                     for disjunct in self.disjuncts]
+                )
+        return self._formula
 
     def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        if self._symbols is None:
+            self._symbols = frozenset(
+                set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+            )
+        return set(self._symbols)
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        node, created = cls.intern((cls, id(antecedent), id(consequent)))
+        if created:
+            node.antecedent = antecedent
+            node.consequent = consequent
+            node.adopt(antecedent, consequent)
+        return node
+
+    def __reduce__(self):
+        return (type(self), (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        if self._hash is None:
+            self._hash = hash(
+                ("implies", hash(self.antecedent), hash(self.consequent))
+            )
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -184,28 +331,45 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        if self._formula is None:
+            antecedent = Sentence.parenthesize(self.antecedent.formula())
+            consequent = Sentence.parenthesize(self.consequent.formula())
+            self._formula = f"{antecedent} => {consequent}"
+        return self._formula
 
     def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+        if self._symbols is None:
+            self._symbols = frozenset(
+                set.union(self.antecedent.symbols(), self.consequent.symbols())
+            )
+        return set(self._symbols)
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        node, created = cls.intern((cls, id(left), id(right)))
+        if created:
+            node.left = left
+            node.right = right
+            node.adopt(left, right)
+        return node
+
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        if self._hash is None:
+            self._hash = hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -217,16 +381,37 @@ class Biconditional(Sentence):
                     and not self.right.evaluate(model)))
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+        if self._formula is None:
+            left = Sentence.parenthesize(str(self.left))
+            right = Sentence.parenthesize(str(self.right))
+            self._formula = f"{left} <=> {right}"
+        return self._formula
 
     def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+        if self._symbols is None:
+            self._symbols = frozenset(
+                set.union(self.left.symbols(), self.right.symbols())
+            )
+        return set(self._symbols)
+
+
+def model_check(knowledge, query, method="sat"):
+    """
+    Checks if knowledge base entails query.
+
+    method is "sat" to decide entailment with the clause-form solver in
+    cnf.py, "truthtable" to evaluate many models at once with the bit
+    vectors in truthtable.py, or "enumerate" to check every model of the
+    symbols one at a time.
+    """
+    if method == "sat":
+        from cnf import entails
+        return entails(knowledge, query)
+    if method == "truthtable":
+        from truthtable import entails
+        return entails(knowledge, query)
+    if method != "enumerate":
+        raise Exception(f"unknown model checking method {method}")
 
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
@@ -0,0 +1,119 @@
+"""
+Bit-parallel truth tables for logic.model_check.
+
+Sentences are compiled into a flat list of instructions over registers,
+where each register holds a Python integer used as a bit vector: bit m is
+the value of a subexpression in model m. The lowest LANE_SYMBOLS symbols
+vary across the bits of one vector and the remaining symbols are fixed per
+pass, so each pass evaluates 2 ** LANE_SYMBOLS models at once.
+"""
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+# Symbols spread across the bits of a vector: 2 ** 16 models per pass
+LANE_SYMBOLS = 16
+
+# Instruction opcodes
+NOT = 0
+AND = 1
+OR = 2
+IMPLIES = 3
+IFF = 4
+
+
+class Program():
+
+    def __init__(self, symbols):
+        # Symbol names, each loaded into the register of the same index
+        self.symbols = list(symbols)
+        self.registers = {name: i for i, name in enumerate(self.symbols)}
+        self.count = len(self.symbols)
+        self.instructions = []
+        self.compiled = {}
+
+    def compile(self, sentence):
+        """
+        Adds instructions computing `sentence` and returns its register.
+        """
+        if isinstance(sentence, Symbol):
+            return self.registers[sentence.name]
+
+        key = id(sentence)
+        if key in self.compiled:
+            return self.compiled[key][0]
+
+        if isinstance(sentence, Not):
+            instruction = (NOT, [self.compile(sentence.operand)])
+        elif isinstance(sentence, And):
+            instruction = (AND, [self.compile(c) for c in sentence.conjuncts])
+        elif isinstance(sentence, Or):
+            instruction = (OR, [self.compile(d) for d in sentence.disjuncts])
+        elif isinstance(sentence, Implication):
+            instruction = (IMPLIES, [self.compile(sentence.antecedent),
+                                     self.compile(sentence.consequent)])
+        elif isinstance(sentence, Biconditional):
+            instruction = (IFF, [self.compile(sentence.left),
+                                 self.compile(sentence.right)])
+        else:
+            raise TypeError("must be a logical sentence")
+
+        register = self.count
+        self.count += 1
+        self.instructions.append((instruction[0], register, instruction[1]))
+
+        # Keep the node alive so its id is not reused while compiling
+        self.compiled[key] = (register, sentence)
+        return register
+
+    def passes(self):
+        """
+        Yields (registers, mask) once per pass over all models, with every
+        instruction already executed.
+        """
+        lanes = min(len(self.symbols), LANE_SYMBOLS)
+        width = 1 << lanes
+        mask = (1 << width) - 1
+
+        registers = [0] * self.count
+        for i in range(lanes):
+            # Alternating runs of 2 ** i zeros and ones
+            run = 1 << i
+            block = ((1 << run) - 1) << run
+            registers[i] = block * (mask // ((1 << (2 * run)) - 1))
+
+        fixed = range(lanes, len(self.symbols))
+        for assignment in range(1 << len(fixed)):
+            for bit, i in enumerate(fixed):
+                registers[i] = mask if assignment >> bit & 1 else 0
+            self.run(registers, mask)
+            yield registers, mask
+
+    def run(self, registers, mask):
+        for op, register, operands in self.instructions:
+            if op == NOT:
+                value = mask ^ registers[operands[0]]
+            elif op == AND:
+                value = mask
+                for operand in operands:
+                    value &= registers[operand]
+            elif op == OR:
+                value = 0
+                for operand in operands:
+                    value |= registers[operand]
+            elif op == IMPLIES:
+                value = (mask ^ registers[operands[0]]) | registers[operands[1]]
+            else:
+                value = mask ^ (registers[operands[0]] ^ registers[operands[1]])
+            registers[register] = value
+
+
+def entails(knowledge, query):
+    """
+    Returns True if `query` holds in every model where `knowledge` holds.
+    """
+    program = Program(sorted(set.union(knowledge.symbols(), query.symbols())))
+    kb = program.compile(knowledge)
+    q = program.compile(query)
+    for registers, mask in program.passes():
+        if registers[kb] & (mask ^ registers[q]):
+            return False
+    return True